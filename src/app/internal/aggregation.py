@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+from app.internal.sql import Parameters, get_connection, to_db_value
+from app.models import Measurement
+
+BUCKET_PATTERN = r"^[1-9][0-9]*[smhd]$"
+
+BUCKET_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+ROLLUP_RESOLUTIONS = (60, 3600, 86400)
+
+
+def bucket_seconds(bucket: str) -> int:
+    return int(bucket[:-1]) * BUCKET_UNITS[bucket[-1]]
+
+
+def to_db_time(time: datetime):
+    return to_db_value(Measurement, "time", time)
+
+
+def bucket_expression(dialect: str, width: int) -> str:
+    if dialect == "postgres":
+        return (
+            f"date_bin(INTERVAL '{width:d} seconds', time, "
+            "TIMESTAMPTZ '1970-01-01 00:00:00+00')"
+        )
+    seconds = "CAST(strftime('%s', time) AS INTEGER)"
+    return f"{seconds} - (({seconds} % {width:d}) + {width:d}) % {width:d}"
+
+
+def to_bucket_time(value) -> datetime:
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc)
+    return datetime.fromtimestamp(value, timezone.utc)
+
+
+def is_aligned(time: datetime | None, width: int) -> bool:
+    return time is None or (time.timestamp() % width == 0)
+
+
+def rollup_resolution(
+    width: int, start_time: datetime | None, finish_time: datetime | None
+) -> int | None:
+    for resolution in reversed(ROLLUP_RESOLUTIONS):
+        if (
+            width % resolution == 0
+            and is_aligned(start_time, resolution)
+            and is_aligned(finish_time, resolution)
+        ):
+            return resolution
+    return None
+
+
+async def aggregate_measurements(
+    sensor_uuid: str,
+    width: int,
+    start_time: datetime | None,
+    finish_time: datetime | None,
+    use_rollups: bool = True,
+) -> list[dict]:
+    connection = get_connection()
+    parameters = Parameters(connection.capabilities.dialect)
+    bucket = bucket_expression(connection.capabilities.dialect, width)
+    conditions = [f"sensor_id = {parameters(sensor_uuid)}"]
+    if start_time:
+        conditions.append(f"time >= {parameters(to_db_time(start_time))}")
+    if finish_time:
+        conditions.append(f"time < {parameters(to_db_time(finish_time))}")
+    resolution = rollup_resolution(width, start_time, finish_time)
+    if use_rollups and resolution:
+        conditions.append(f"resolution = {parameters(resolution)}")
+        aggregates = (
+            "MIN(minimum) AS min, MAX(maximum) AS max, SUM(total) / SUM(count) AS avg, "
+            "SUM(total) AS sum, SUM(count) AS count FROM measurementrollup"
+        )
+    else:
+        aggregates = (
+            "MIN(value) AS min, MAX(value) AS max, AVG(value) AS avg, "
+            "SUM(value) AS sum, COUNT(*) AS count FROM measurement"
+        )
+    query = (
+        f"SELECT {bucket} AS bucket, {aggregates} WHERE {' AND '.join(conditions)} "
+        "GROUP BY bucket ORDER BY bucket"
+    )
+    rows = await connection.execute_query_dict(query, parameters.values)
+    return [
+        {
+            "time": to_bucket_time(row["bucket"]),
+            **{key: row[key] for key in ("min", "max", "avg", "sum", "count")},
+        }
+        for row in rows
+    ]
@@ -1,3 +1,6 @@
+from collections import OrderedDict
+from hashlib import sha256
+from time import time
 from typing import Annotated
 from fastapi.security import OAuth2PasswordBearer as OAuth2
 from jose import jwt
@@ -18,6 +21,49 @@ class Token:
         return jwt.decode(token, cls.salt, algorithms=[cls.__algorithm])
 
 
+class TokenCache:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._tokens: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "TokenCache":
+        return cls(
+            max_size=int(getenv("TOKEN_CACHE_SIZE") or 10000),
+            ttl_seconds=float(getenv("TOKEN_CACHE_TTL_SECONDS") or 300),
+        )
+
+    def decode(self, token: str) -> dict:
+        if not self.max_size:
+            return Token.decode_token(token)
+        key = sha256(token.encode()).digest()
+        now = time()
+        cached = self._tokens.get(key)
+        if cached and cached[0] > now:
+            self._tokens.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        token_data = Token.decode_token(token)
+        expires = now + self.ttl_seconds
+        if "exp" in token_data:
+            expires = min(expires, float(token_data["exp"]))
+        self._tokens[key] = (expires, token_data)
+        self._tokens.move_to_end(key)
+        while len(self._tokens) > self.max_size:
+            self._tokens.popitem(last=False)
+        return token_data
+
+    def metrics(self) -> dict:
+        return {"size": len(self._tokens), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache.from_env()
+
+
 async def authorize(token: Annotated[str, Depends(OAuth2(tokenUrl="actions/token"))]):
-    token_data = Token.decode_token(token)
+    token_data = token_cache.decode(token)
     return token_data["uuid"]
@@ -0,0 +1,125 @@
+import asyncio
+import hmac
+from datetime import datetime, timezone
+from hashlib import sha256
+from os import getenv
+from secrets import token_urlsafe
+from time import monotonic
+from typing import Annotated, NamedTuple
+from fastapi import Depends, Header, HTTPException
+from fastapi.security import OAuth2PasswordBearer as OAuth2
+from app.internal.authentication import Token, token_cache
+from app.models import Device, DeviceKey
+
+
+class IndexedKey(NamedTuple):
+    digest: bytes
+    device_id: str
+    user_id: str
+
+
+class Ingester(NamedTuple):
+    user_id: str
+    device_id: str | None = None
+
+
+class DeviceKeyIndex:
+    def __init__(self, secret: str, refresh_seconds: float):
+        self.secret = secret.encode()
+        self.refresh_seconds = refresh_seconds
+        self.hits = 0
+        self.rejected = 0
+        self.refreshes = 0
+        self._keys: dict[str, IndexedKey] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls) -> "DeviceKeyIndex":
+        return cls(
+            secret=getenv("DEVICE_KEY_SECRET") or Token.salt,
+            refresh_seconds=float(getenv("DEVICE_KEY_REFRESH_SECONDS") or 30),
+        )
+
+    def digest(self, secret: str) -> bytes:
+        return hmac.new(self.secret, secret.encode(), sha256).digest()
+
+    def is_stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or monotonic() - self._loaded_at > self.refresh_seconds
+        )
+
+    async def refresh(self) -> None:
+        rows = await DeviceKey.filter(revoked_at=None).values_list(
+            "uuid", "digest", "device_id", "device__user_id"
+        )
+        self._keys = {
+            str(key_id): IndexedKey(bytes.fromhex(digest), str(device_id), str(user_id))
+            for key_id, digest, device_id, user_id in rows
+        }
+        self._loaded_at = monotonic()
+        self.refreshes += 1
+
+    async def create(self, device: Device, name: str | None) -> tuple[DeviceKey, str]:
+        secret = token_urlsafe(32)
+        digest = self.digest(secret)
+        key = await DeviceKey.create(name=name, digest=digest.hex(), device=device)
+        self._keys[str(key.uuid)] = IndexedKey(
+            digest, str(device.uuid), str(device.user_id)
+        )
+        return key, f"{key.uuid}.{secret}"
+
+    async def revoke(self, key: DeviceKey) -> None:
+        key.revoked_at = datetime.now(timezone.utc)
+        await key.save(update_fields=["revoked_at"])
+        self._keys.pop(str(key.uuid), None)
+
+    def discard(self, device_id: str = "", user_id: str = "") -> None:
+        self._keys = {
+            key_id: key
+            for key_id, key in self._keys.items()
+            if key.device_id != device_id and key.user_id != user_id
+        }
+
+    async def verify(self, device_key: str) -> IndexedKey | None:
+        if self.is_stale():
+            async with self._lock:
+                if self.is_stale():
+                    await self.refresh()
+        key_id, _, secret = device_key.partition(".")
+        key = self._keys.get(key_id)
+        if key is None or not hmac.compare_digest(key.digest, self.digest(secret)):
+            self.rejected += 1
+            return None
+        self.hits += 1
+        return key
+
+    def metrics(self) -> dict:
+        return {
+            "keys": len(self._keys),
+            "hits": self.hits,
+            "rejected": self.rejected,
+            "refreshes": self.refreshes,
+        }
+
+
+device_key_index = DeviceKeyIndex.from_env()
+
+
+async def authorize_ingest(
+    token: Annotated[
+        str | None, Depends(OAuth2(tokenUrl="actions/token", auto_error=False))
+    ],
+    device_key: Annotated[str | None, Header(alias="X-Device-Key")] = None,
+) -> Ingester:
+    if device_key:
+        key = await device_key_index.verify(device_key)
+        if key is None:
+            raise HTTPException(401, "Invalid device key")
+        return Ingester(key.user_id, key.device_id)
+    if not token:
+        raise HTTPException(
+            401, "Not authenticated", headers={"WWW-Authenticate": "Bearer"}
+        )
+    return Ingester(token_cache.decode(token)["uuid"])
@@ -0,0 +1,86 @@
+from tortoise.queryset import QuerySet
+from app.internal.pagination import iter_chunks
+
+DOWNSAMPLING_CHUNK_SIZE = 5000
+
+
+class LargestTriangleThreeBuckets:
+    def __init__(self, count: int, threshold: int):
+        self.count = count
+        self.threshold = threshold
+        self.every = (count - 2) / (threshold - 2)
+        self.index = 0
+        self.bucket = 0
+        self.incoming_bucket = 0
+        self.current = []
+        self.following = []
+        self.selected = []
+
+    def bucket_end(self, bucket: int) -> int:
+        if bucket >= self.threshold - 3:
+            return self.count - 1
+        return int((bucket + 1) * self.every) + 1
+
+    def select(self, average: tuple[float, float]) -> None:
+        _, a_time, a_value = self.selected[-1]
+        a_x = a_time.timestamp()
+        c_x, c_y = average
+        best_area, best_row = -1.0, None
+        for row in self.current:
+            area = abs(
+                (a_x - c_x) * (row[2] - a_value)
+                - (a_x - row[1].timestamp()) * (c_y - a_value)
+            )
+            if area > best_area:
+                best_area, best_row = area, row
+        if best_row:
+            self.selected.append(best_row)
+
+    def add(self, row: tuple) -> None:
+        if self.count <= self.threshold or self.index == 0:
+            self.selected.append(row)
+        elif self.index == self.count - 1:
+            self.finish_buckets(row)
+        elif self.index < self.count - 1:
+            while self.index >= self.bucket_end(self.incoming_bucket):
+                self.incoming_bucket += 1
+            if self.incoming_bucket == self.bucket:
+                self.current.append(row)
+            elif self.incoming_bucket == self.bucket + 1:
+                self.following.append(row)
+            else:
+                self.select(average(self.following))
+                self.current, self.following = self.following, [row]
+                self.bucket += 1
+        self.index += 1
+
+    def finish_buckets(self, last: tuple) -> None:
+        if self.following:
+            self.select(average(self.following))
+            self.current = self.following
+        self.select((last[1].timestamp(), last[2]))
+        self.selected.append(last)
+        self.current, self.following = [], []
+
+    def finish(self) -> list[tuple]:
+        # Rows deleted after counting end the stream before the last point
+        if self.index < self.count and (pending := self.following or self.current):
+            self.finish_buckets(pending.pop())
+        return self.selected
+
+
+def average(rows: list[tuple]) -> tuple[float, float]:
+    x = sum(row[1].timestamp() for row in rows) / len(rows)
+    y = sum(row[2] for row in rows) / len(rows)
+    return x, y
+
+
+async def downsample_measurements(queryset: QuerySet, max_points: int) -> list[dict]:
+    sampler = LargestTriangleThreeBuckets(await queryset.count(), max_points)
+    async for rows in iter_chunks(queryset, DOWNSAMPLING_CHUNK_SIZE):
+        for row in rows:
+            sampler.add(row)
+    return [
+        {"uuid": uuid, "time": time, "value": value}
+        for uuid, time, value in sampler.finish()
+    ]
@@ -0,0 +1,79 @@
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from json import dumps
+from os import getenv
+from typing import AsyncIterator, Literal
+from tortoise.queryset import QuerySet
+from app.internal.pagination import iter_chunks
+
+EXPORT_CHUNK_SIZE = int(getenv("EXPORT_CHUNK_SIZE") or 5000)
+
+ExportFormat = Literal["ndjson", "csv"]
+
+ColumnarFormat = Literal["json", "binary"]
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "json": "application/json",
+    "binary": "application/octet-stream",
+}
+
+
+def format_time(time: datetime) -> str:
+    return time.isoformat().replace("+00:00", "Z")
+
+
+def format_rows(rows: list[tuple], export_format: ExportFormat) -> bytes:
+    if export_format == "csv":
+        lines = (
+            f"{uuid},{format_time(time)},{value!r}\n" for uuid, time, value in rows
+        )
+    else:
+        lines = (
+            f'{{"uuid": "{uuid}", "time": "{format_time(time)}", "value": {value!r}}}\n'
+            for uuid, time, value in rows
+        )
+    return "".join(lines).encode()
+
+
+async def export_measurements(
+    queryset: QuerySet, export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    if export_format == "csv":
+        yield b"uuid,time,value\n"
+    async for rows in iter_chunks(queryset, EXPORT_CHUNK_SIZE):
+        yield format_rows(rows, export_format)
+
+
+async def measurement_columns(queryset: QuerySet) -> tuple[list[datetime], list[float]]:
+    times, values = [], []
+    async for rows in iter_chunks(queryset, EXPORT_CHUNK_SIZE):
+        for _, time, value in rows:
+            times.append(time)
+            values.append(value)
+    return times, values
+
+
+def pack_columns(times: list[datetime], values: list[float]) -> bytes:
+    packed_times = array(
+        "q", ((time - EPOCH) // timedelta(microseconds=1) for time in times)
+    )
+    packed_values = array("d", values)
+    if sys.byteorder == "big":
+        packed_times.byteswap()
+        packed_values.byteswap()
+    return packed_times.tobytes() + packed_values.tobytes()
+
+
+async def columnar_measurements(
+    queryset: QuerySet, columnar_format: ColumnarFormat
+) -> tuple[bytes, int]:
+    times, values = await measurement_columns(queryset)
+    if columnar_format == "binary":
+        return pack_columns(times, values), len(times)
+    content = {"time": [format_time(time) for time in times], "value": values}
+    return dumps(content, separators=(",", ":")).encode(), len(times)
@@ -0,0 +1,41 @@
+from functools import lru_cache
+from typing import Callable, TypedDict
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from tortoise.exceptions import ValidationError
+from tortoise.queryset import QuerySet
+
+
+def field_selector(model: type[BaseModel]) -> Callable[[str], tuple[str, ...]]:
+    def select_fields(fields: str = "") -> tuple[str, ...]:
+        selected = tuple(
+            dict.fromkeys(field.strip() for field in fields.split(",") if field.strip())
+        )
+        if unknown := [field for field in selected if field not in model.model_fields]:
+            raise ValidationError(f"fields: unknown field {', '.join(unknown)}")
+        return selected or tuple(model.model_fields)
+
+    return select_fields
+
+
+def select(queryset: QuerySet, fields: tuple[str, ...], *required: str) -> QuerySet:
+    return queryset.values(*dict.fromkeys(fields + required))
+
+
+@lru_cache
+def row_adapter(model: type[BaseModel], fields: tuple[str, ...]) -> TypeAdapter:
+    annotations = {field: model.model_fields[field].annotation for field in fields}
+    return TypeAdapter(list[TypedDict(f"{model.__name__}Fields", annotations)])
+
+
+def rows_response(
+    rows: list[dict],
+    model: type[BaseModel],
+    fields: tuple[str, ...],
+    headers: dict | None = None,
+) -> Response:
+    return Response(
+        row_adapter(model, fields).dump_json(rows),
+        headers=headers,
+        media_type="application/json",
+    )
@@ -0,0 +1,287 @@
+from datetime import datetime, timezone
+from itertools import islice
+from os import getenv
+from typing import AsyncIterator
+from uuid import UUID
+from tortoise.backends.asyncpg import AsyncpgDBClient
+from tortoise.exceptions import DoesNotExist, IntegrityError, ValidationError
+from tortoise.transactions import in_transaction
+from app.internal.latest import update_latest
+from app.internal.sql import Parameters, to_db_value
+from app.internal.rollups import add_to_rollups, refresh_rollups
+from app.models import Measurement, Sensor
+from app.pydantics.measurement import ConflictMode, MeasurementInPydantic
+
+LOOKUP_CHUNK_SIZE = 500
+INSERT_BATCH_SIZE = 1000
+COPY_MIN_ROWS = int(getenv("INGEST_COPY_MIN_ROWS") or 100)
+INSERT_COLUMNS = ["uuid", "time", "value", "sensor_id", "user_id"]
+STAGING_COLUMNS = INSERT_COLUMNS + ["ordinal"]
+STREAM_CHUNK_SIZE = int(getenv("INGEST_CHUNK_SIZE") or 1000)
+STREAM_MAX_LINE_LENGTH = 4096
+STREAM_MAX_ERRORS = 100
+
+
+def to_utc(time: datetime) -> datetime:
+    if time.tzinfo is None:
+        return time.replace(tzinfo=timezone.utc)
+    return time.astimezone(timezone.utc)
+
+
+def chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+async def check_sensors(
+    sensor_uuids: set[str], user_id: str, device_id: str | None = None
+) -> None:
+    owned = Sensor.filter(uuid__in=sensor_uuids, user_id=user_id)
+    if device_id:
+        owned = owned.filter(device_id=device_id)
+    if await owned.count() != len(sensor_uuids):
+        raise DoesNotExist(Sensor)
+
+
+async def find_existing(keys: set[tuple[str, datetime]]) -> dict[tuple, UUID]:
+    times_by_sensor: dict[str, list[datetime]] = {}
+    for sensor_id, time in keys:
+        times_by_sensor.setdefault(sensor_id, []).append(time)
+
+    existing = {}
+    for sensor_id, times in times_by_sensor.items():
+        for times_chunk in chunked(times, LOOKUP_CHUNK_SIZE):
+            rows = await Measurement.filter(
+                sensor_id=sensor_id, time__in=times_chunk
+            ).values_list("time", "uuid")
+            existing.update({(sensor_id, to_utc(time)): uuid for time, uuid in rows})
+    return existing
+
+
+async def bulk_insert(
+    measurements: list[Measurement], on_conflict: ConflictMode
+) -> dict[tuple, tuple[UUID, str]]:
+    existing = await find_existing(
+        {(str(measurement.sensor_id), measurement.time) for measurement in measurements}
+    )
+    results = {}
+    new_measurements = []
+    for measurement in measurements:
+        key = (str(measurement.sensor_id), measurement.time)
+        if key not in existing:
+            results[key] = (measurement.uuid, "created")
+            new_measurements.append(measurement)
+        elif on_conflict == "update":
+            results[key] = (existing[key], "updated")
+
+    if on_conflict == "update":
+        await Measurement.bulk_create(
+            measurements,
+            batch_size=INSERT_BATCH_SIZE,
+            on_conflict=["time", "sensor_id"],
+            update_fields=["value"],
+        )
+    elif new_measurements:
+        await Measurement.bulk_create(
+            new_measurements, batch_size=INSERT_BATCH_SIZE, ignore_conflicts=True
+        )
+    return results
+
+
+def conflict_action(on_conflict: ConflictMode) -> str:
+    if on_conflict == "update":
+        return "DO UPDATE SET value = EXCLUDED.value"
+    return "DO NOTHING"
+
+
+def returned_statuses(rows) -> dict[tuple, tuple[UUID, str]]:
+    return {
+        (str(row["sensor_id"]), to_utc(row["time"])): (
+            row["uuid"],
+            "created" if row["inserted"] else "updated",
+        )
+        for row in rows
+    }
+
+
+async def returning_insert(
+    connection: AsyncpgDBClient,
+    measurements: list[Measurement],
+    on_conflict: ConflictMode,
+) -> dict[tuple, tuple[UUID, str]]:
+    results = {}
+    for chunk in chunked(measurements, INSERT_BATCH_SIZE):
+        parameters = Parameters("postgres")
+        values = ", ".join(
+            "({})".format(
+                ", ".join(
+                    parameters(
+                        to_db_value(Measurement, column, getattr(measurement, column))
+                    )
+                    for column in INSERT_COLUMNS
+                )
+            )
+            for measurement in chunk
+        )
+        rows = await connection.execute_query_dict(
+            f"INSERT INTO measurement ({', '.join(INSERT_COLUMNS)}) VALUES {values} "
+            f"ON CONFLICT (time, sensor_id) {conflict_action(on_conflict)} "
+            "RETURNING uuid, time, sensor_id, xmax = 0 AS inserted",
+            parameters.values,
+        )
+        results.update(returned_statuses(rows))
+    return results
+
+
+async def copy_insert(
+    connection: AsyncpgDBClient,
+    measurements: list[Measurement],
+    on_conflict: ConflictMode,
+) -> dict[tuple, tuple[UUID, str]]:
+    records = [
+        (
+            measurement.uuid,
+            measurement.time,
+            measurement.value,
+            UUID(str(measurement.sensor_id)),
+            UUID(str(measurement.user_id)),
+            ordinal,
+        )
+        for ordinal, measurement in enumerate(measurements)
+    ]
+    async with connection.acquire_connection() as raw_connection:
+        await raw_connection.execute(
+            "CREATE TEMP TABLE measurement_staging "
+            "(LIKE measurement INCLUDING DEFAULTS, ordinal INTEGER) ON COMMIT DROP"
+        )
+        await raw_connection.copy_records_to_table(
+            "measurement_staging", records=records, columns=STAGING_COLUMNS
+        )
+        rows = await raw_connection.fetch(
+            "INSERT INTO measurement (uuid, time, value, sensor_id, user_id) "
+            "SELECT uuid, time, value, sensor_id, user_id FROM measurement_staging "
+            "ORDER BY ordinal ON CONFLICT (time, sensor_id) "
+            f"{conflict_action(on_conflict)} "
+            "RETURNING uuid, time, sensor_id, xmax = 0 AS inserted"
+        )
+        await raw_connection.execute("DROP TABLE measurement_staging")
+    return returned_statuses(rows)
+
+
+async def insert_measurements(
+    readings: list[dict], user_id: str, on_conflict: ConflictMode = "skip"
+) -> dict:
+    statuses = []
+    candidates = {}
+    for reading in readings:
+        key = (str(reading["sensor_id"]), to_utc(reading["time"]))
+        status = {
+            "uuid": None,
+            "time": key[1],
+            "value": reading["value"],
+            "status": "conflict",
+        }
+        if key not in candidates:
+            candidates[key] = (
+                Measurement(
+                    time=key[1],
+                    value=reading["value"],
+                    sensor_id=key[0],
+                    user_id=user_id,
+                ),
+                status,
+            )
+        statuses.append(status)
+
+    measurements = [measurement for measurement, _ in candidates.values()]
+    async with in_transaction() as connection:
+        is_postgres = isinstance(connection, AsyncpgDBClient)
+        if not measurements:
+            results = {}
+        elif is_postgres and len(measurements) >= COPY_MIN_ROWS:
+            results = await copy_insert(connection, measurements, on_conflict)
+        elif is_postgres:
+            results = await returning_insert(connection, measurements, on_conflict)
+        else:
+            results = await bulk_insert(measurements, on_conflict)
+        if on_conflict == "error" and len(results) != len(statuses):
+            raise IntegrityError("time, sensor: duplicate measurement")
+        for key, (uuid, _) in results.items():
+            candidates[key][0].uuid = uuid
+        await update_latest(candidates[key][0] for key in results)
+        await add_to_rollups(
+            candidates[key][0]
+            for key, (_, result) in results.items()
+            if result == "created"
+        )
+        await refresh_rollups(
+            key for key, (_, result) in results.items() if result == "updated"
+        )
+
+    for key, (uuid, result) in results.items():
+        candidates[key][1].update(uuid=uuid, status=result)
+    created = sum(result == "created" for _, result in results.values())
+    return {
+        "created": created,
+        "updated": len(results) - created,
+        "conflicts": len(statuses) - len(results),
+        "measurements": statuses,
+    }
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    rest = b""
+    async for data in stream:
+        lines = (rest + data).split(b"\n")
+        rest = lines.pop()
+        if len(rest) > STREAM_MAX_LINE_LENGTH:
+            raise ValidationError(f"line: longer than {STREAM_MAX_LINE_LENGTH} bytes")
+        for line in lines:
+            yield line
+    yield rest
+
+
+def parse_line(line: bytes, is_csv: bool) -> MeasurementInPydantic:
+    if not is_csv:
+        return MeasurementInPydantic.model_validate_json(line)
+    time, value = line.decode().split(",")
+    return MeasurementInPydantic.model_validate({"time": time, "value": value})
+
+
+async def ingest_stream(
+    stream: AsyncIterator[bytes],
+    sensor_uuid: str,
+    user_id: str,
+    is_csv: bool,
+    on_conflict: ConflictMode = "skip",
+) -> dict:
+    report = {"accepted": 0, "updated": 0, "conflicts": 0, "rejected": 0, "errors": []}
+
+    async def flush(readings):
+        result = await insert_measurements(readings, user_id, on_conflict)
+        report["accepted"] += result["created"]
+        report["updated"] += result["updated"]
+        report["conflicts"] += result["conflicts"]
+
+    readings = []
+    line_number = 0
+    async for line in iter_lines(stream):
+        line_number += 1
+        line = line.strip()
+        if not line or (is_csv and line_number == 1 and line.startswith(b"time")):
+            continue
+        try:
+            measurement = parse_line(line, is_csv)
+        except ValueError as exc:
+            report["rejected"] += 1
+            if len(report["errors"]) < STREAM_MAX_ERRORS:
+                report["errors"].append({"line": line_number, "msg": str(exc)})
+            continue
+        readings.append({**measurement.model_dump(), "sensor_id": sensor_uuid})
+        if len(readings) >= STREAM_CHUNK_SIZE:
+            await flush(readings)
+            readings = []
+    if readings:
+        await flush(readings)
+    return report
@@ -0,0 +1,142 @@
+from typing import Awaitable, Callable, Iterable
+from tortoise.transactions import in_transaction
+from app.internal.sql import (
+    Parameters,
+    get_connection,
+    to_db_value,
+    to_python_value,
+)
+from app.models import LatestMeasurement, Measurement, Sensor
+
+COLUMNS = ("uuid", "sensor_id", "time", "value")
+BACKFILL_SENSORS = 100
+
+UPSERT = (
+    "ON CONFLICT (sensor_id) DO UPDATE SET uuid = excluded.uuid, "
+    "time = excluded.time, value = excluded.value "
+    "WHERE excluded.time >= latestmeasurement.time"
+)
+
+
+async def upsert_latest(rows: list[tuple]) -> None:
+    connection = get_connection()
+    parameters = Parameters(connection.capabilities.dialect)
+    values = ", ".join(
+        "({})".format(
+            ", ".join(
+                parameters(to_db_value(LatestMeasurement, column, value))
+                for column, value in zip(COLUMNS, row)
+            )
+        )
+        for row in rows
+    )
+    await connection.execute_query(
+        f"INSERT INTO latestmeasurement ({', '.join(COLUMNS)}) VALUES {values} "
+        f"{UPSERT}",
+        parameters.values,
+    )
+
+
+async def update_latest(measurements: Iterable[Measurement]) -> None:
+    latest: dict[str, Measurement] = {}
+    for measurement in measurements:
+        sensor_id = str(measurement.sensor_id)
+        if sensor_id not in latest or measurement.time >= latest[sensor_id].time:
+            latest[sensor_id] = measurement
+    rows = [
+        (measurement.uuid, sensor_id, measurement.time, measurement.value)
+        for sensor_id, measurement in latest.items()
+    ]
+    for start in range(0, len(rows), 500):
+        await upsert_latest(rows[start : start + 500])
+
+
+async def refresh_latest(sensor_ids: Iterable[str]) -> None:
+    for sensor_id in set(map(str, sensor_ids)):
+        await LatestMeasurement.filter(sensor_id=sensor_id).delete()
+        measurement = (
+            await Measurement.filter(sensor_id=sensor_id).order_by("-time").first()
+        )
+        if measurement:
+            await update_latest([measurement])
+
+
+async def backfill_latest(
+    position: str | None, save_position: Callable[[str], Awaitable[None]]
+) -> None:
+    sensor_ids = sorted(
+        str(sensor_id)
+        for sensor_id in await Sensor.all().values_list("uuid", flat=True)
+    )
+    sensor_ids = [sensor_id for sensor_id in sensor_ids if sensor_id > (position or "")]
+    columns = ", ".join(COLUMNS)
+    for start in range(0, len(sensor_ids), BACKFILL_SENSORS):
+        chunk = sensor_ids[start : start + BACKFILL_SENSORS]
+        async with in_transaction() as connection:
+            parameters = Parameters(connection.capabilities.dialect)
+            sensors = ", ".join(
+                parameters(to_db_value(Measurement, "sensor_id", sensor_id))
+                for sensor_id in chunk
+            )
+            if connection.capabilities.dialect == "postgres":
+                newest = (
+                    f"SELECT DISTINCT ON (sensor_id) {columns} FROM measurement "
+                    f"WHERE sensor_id IN ({sensors}) ORDER BY sensor_id, time DESC"
+                )
+            else:
+                newest = (
+                    f"SELECT {columns} FROM (SELECT {columns}, ROW_NUMBER() OVER "
+                    "(PARTITION BY sensor_id ORDER BY time DESC) AS position "
+                    f"FROM measurement WHERE sensor_id IN ({sensors})) AS ranked "
+                    "WHERE position = 1"
+                )
+            await connection.execute_query(
+                f"INSERT INTO latestmeasurement ({columns}) {newest} {UPSERT}",
+                parameters.values,
+            )
+            await save_position(chunk[-1])
+
+
+async def latest_readings(
+    device_id: str, count: int, use_latest: bool = True
+) -> dict[str, list[dict]]:
+    if count == 1 and use_latest:
+        rows = await LatestMeasurement.filter(sensor__device_id=device_id).values(
+            "uuid", "time", "value", "sensor_id"
+        )
+        return {
+            str(row["sensor_id"]): [
+                {key: row[key] for key in ("uuid", "time", "value")}
+            ]
+            for row in rows
+        }
+    connection = get_connection()
+    parameters = Parameters(connection.capabilities.dialect)
+    if connection.capabilities.dialect == "postgres":
+        query = (
+            "SELECT latest.uuid, latest.time, latest.value, sensor.uuid AS sensor_id "
+            "FROM sensor CROSS JOIN LATERAL (SELECT m.uuid, m.time, m.value "
+            "FROM measurement AS m WHERE m.sensor_id = sensor.uuid "
+            f"ORDER BY m.time DESC LIMIT {parameters(count)}) AS latest "
+            f"WHERE sensor.device_id = {parameters(device_id)} "
+            "ORDER BY sensor.uuid, latest.time DESC"
+        )
+    else:
+        query = (
+            "SELECT uuid, time, value, sensor_id FROM ("
+            "SELECT uuid, time, value, sensor_id, ROW_NUMBER() OVER "
+            "(PARTITION BY sensor_id ORDER BY time DESC) AS position FROM measurement "
+            "WHERE sensor_id IN (SELECT uuid FROM sensor WHERE device_id = "
+            f"{parameters(device_id)})) AS ranked WHERE position <= {parameters(count)} "
+            "ORDER BY sensor_id, time DESC"
+        )
+    rows = await connection.execute_query_dict(query, parameters.values)
+    readings: dict[str, list[dict]] = {}
+    for row in rows:
+        readings.setdefault(str(row["sensor_id"]), []).append(
+            {
+                key: to_python_value(Measurement, key, row[key])
+                for key in ("uuid", "time", "value")
+            }
+        )
+    return readings
@@ -0,0 +1,60 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from json import dumps, loads
+from typing import AsyncIterator
+from uuid import UUID
+from tortoise.exceptions import ValidationError
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+
+
+def encode_cursor(time: datetime, uuid: UUID) -> str:
+    data = dumps([time.isoformat(), str(uuid)]).encode()
+    return urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        time, uuid = loads(urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(time), UUID(uuid)
+    except (TypeError, ValueError):
+        raise ValidationError("cursor: invalid pagination cursor")
+
+
+def after(queryset: QuerySet, time: datetime, uuid: UUID) -> QuerySet:
+    return queryset.filter(
+        Q(time__gt=time) | Q(time=time, uuid__gt=uuid), time__gte=time
+    )
+
+
+def paginate(queryset: QuerySet, limit: int | None, cursor: str) -> QuerySet:
+    if cursor:
+        queryset = after(queryset, *decode_cursor(cursor))
+    queryset = queryset.order_by("time", "uuid")
+    if limit:
+        queryset = queryset.limit(limit)
+    return queryset
+
+
+def next_cursor(page: list[dict], limit: int | None) -> str | None:
+    if not limit or len(page) < limit:
+        return None
+    return encode_cursor(page[-1]["time"], page[-1]["uuid"])
+
+
+async def iter_chunks(
+    queryset: QuerySet, chunk_size: int
+) -> AsyncIterator[list[tuple]]:
+    chunk_queryset = queryset
+    while True:
+        rows = (
+            await chunk_queryset.order_by("time", "uuid")
+            .limit(chunk_size)
+            .values_list("uuid", "time", "value")
+        )
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            break
+        uuid, time, _ = rows[-1]
+        chunk_queryset = after(queryset, time, uuid)
@@ -0,0 +1,94 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from os import getenv
+from typing import Callable
+from argon2 import Parameters, PasswordHasher, profiles
+from fastapi import HTTPException
+
+PROFILES = {
+    "rfc_9106_low_memory": profiles.RFC_9106_LOW_MEMORY,
+    "rfc_9106_high_memory": profiles.RFC_9106_HIGH_MEMORY,
+    "pre_21_2": profiles.PRE_21_2,
+    "minimal": replace(
+        profiles.RFC_9106_LOW_MEMORY, time_cost=1, memory_cost=8, parallelism=1
+    ),
+}
+
+COST_VARIABLES = {
+    "PASSWORD_HASH_TIME_COST": "time_cost",
+    "PASSWORD_HASH_MEMORY_COST": "memory_cost",
+    "PASSWORD_HASH_PARALLELISM": "parallelism",
+}
+
+
+def hash_parameters() -> Parameters:
+    profile = PROFILES[getenv("PASSWORD_HASH_PROFILE") or "rfc_9106_low_memory"]
+    costs = {
+        field: int(value)
+        for variable, field in COST_VARIABLES.items()
+        if (value := getenv(variable))
+    }
+    return replace(profile, **costs)
+
+
+class PasswordHasherPool:
+    def __init__(
+        self, workers: int, queue_size: int, parameters: Parameters | None = None
+    ):
+        self.hasher = PasswordHasher.from_parameters(
+            parameters or profiles.RFC_9106_LOW_MEMORY
+        )
+        self.workers = workers
+        self.queue_size = queue_size
+        self.pending = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._executor = (
+            ThreadPoolExecutor(workers, thread_name_prefix="password")
+            if workers
+            else None
+        )
+
+    @classmethod
+    def from_env(cls) -> "PasswordHasherPool":
+        return cls(
+            workers=int(getenv("PASSWORD_HASH_WORKERS") or 2),
+            queue_size=int(getenv("PASSWORD_HASH_QUEUE") or 64),
+            parameters=hash_parameters(),
+        )
+
+    async def _run(self, function: Callable, *args):
+        if self._executor is None:
+            return function(*args)
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise HTTPException(
+                503, "Password hashing is busy", headers={"Retry-After": "1"}
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, function, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.hasher.hash, password)
+
+    async def verify(self, hashed: str, password: str) -> bool:
+        return await self._run(self.hasher.verify, hashed, password)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return self.hasher.check_needs_rehash(hashed)
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+
+password_pool = PasswordHasherPool.from_env()
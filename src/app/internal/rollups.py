@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterable
+from uuid import uuid4
+from app.internal.aggregation import (
+    ROLLUP_RESOLUTIONS,
+    bucket_expression,
+    to_bucket_time,
+)
+from app.internal.sql import (
+    Parameters,
+    get_connection,
+    to_db_value,
+    to_python_value,
+)
+from tortoise.transactions import in_transaction
+from app.models import Measurement, MeasurementRollup
+
+MAX_RANGE_GAP = 100
+BACKFILL_WINDOW = timedelta(days=30)
+
+COLUMNS = (
+    "uuid",
+    "sensor_id",
+    "resolution",
+    "time",
+    "minimum",
+    "maximum",
+    "total",
+    "count",
+)
+
+
+def bucket_start(time: datetime, width: int) -> datetime:
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=timezone.utc)
+    seconds = int(time.timestamp())
+    return datetime.fromtimestamp(seconds - seconds % width, timezone.utc)
+
+
+def to_db(field: str, value):
+    return to_db_value(MeasurementRollup, field, value)
+
+
+async def upsert_rollups(rows: list[tuple], combine: bool) -> None:
+    connection = get_connection()
+    dialect = connection.capabilities.dialect
+    parameters = Parameters(dialect)
+    values = ", ".join(
+        "({})".format(
+            ", ".join(
+                parameters(to_db(column, value)) for column, value in zip(COLUMNS, row)
+            )
+        )
+        for row in rows
+    )
+    if combine:
+        least, greatest = (
+            ("min", "max") if dialect == "sqlite" else ("LEAST", "GREATEST")
+        )
+        updates = (
+            f"minimum = {least}(measurementrollup.minimum, excluded.minimum), "
+            f"maximum = {greatest}(measurementrollup.maximum, excluded.maximum), "
+            "total = measurementrollup.total + excluded.total, "
+            "count = measurementrollup.count + excluded.count"
+        )
+    else:
+        updates = (
+            "minimum = excluded.minimum, maximum = excluded.maximum, "
+            "total = excluded.total, count = excluded.count"
+        )
+    await connection.execute_query(
+        f"INSERT INTO measurementrollup ({', '.join(COLUMNS)}) VALUES {values} "
+        f"ON CONFLICT (sensor_id, resolution, time) DO UPDATE SET {updates}",
+        parameters.values,
+    )
+
+
+async def add_to_rollups(measurements: Iterable[Measurement]) -> None:
+    buckets: dict[tuple, list] = {}
+    for measurement in measurements:
+        value = measurement.value
+        for resolution in ROLLUP_RESOLUTIONS:
+            bucket = bucket_start(measurement.time, resolution)
+            key = (str(measurement.sensor_id), resolution, bucket)
+            if aggregate := buckets.get(key):
+                aggregate[0] = min(aggregate[0], value)
+                aggregate[1] = max(aggregate[1], value)
+                aggregate[2] += value
+                aggregate[3] += 1
+            else:
+                buckets[key] = [value, value, value, 1]
+    rows = [(uuid4(), *key, *aggregate) for key, aggregate in buckets.items()]
+    for start in range(0, len(rows), 500):
+        await upsert_rollups(rows[start : start + 500], combine=True)
+
+
+def bucket_ranges(
+    buckets: set[datetime], width: int
+) -> list[tuple[datetime, datetime]]:
+    ranges = []
+    for bucket in sorted(buckets):
+        if ranges and bucket - ranges[-1][1] <= timedelta(
+            seconds=width * MAX_RANGE_GAP
+        ):
+            ranges[-1][1] = bucket + timedelta(seconds=width)
+        else:
+            ranges.append([bucket, bucket + timedelta(seconds=width)])
+    return [tuple(time_range) for time_range in ranges]
+
+
+async def rollup_aggregates(
+    sensor_id: str, resolution: int, start: datetime, finish: datetime
+) -> dict[datetime, dict]:
+    connection = get_connection()
+    dialect = connection.capabilities.dialect
+    parameters = Parameters(dialect)
+    if resolution == ROLLUP_RESOLUTIONS[0]:
+        source = (
+            "MIN(value) AS minimum, MAX(value) AS maximum, "
+            "SUM(value) AS total, COUNT(*) AS count FROM measurement WHERE "
+        )
+    else:
+        finer = ROLLUP_RESOLUTIONS[ROLLUP_RESOLUTIONS.index(resolution) - 1]
+        source = (
+            "MIN(minimum) AS minimum, MAX(maximum) AS maximum, "
+            "SUM(total) AS total, SUM(count) AS count FROM measurementrollup "
+            f"WHERE resolution = {parameters(finer)} AND "
+        )
+    rows = await connection.execute_query_dict(
+        f"SELECT {bucket_expression(dialect, resolution)} AS bucket, {source}"
+        f"sensor_id = {parameters(sensor_id)} "
+        f"AND time >= {parameters(to_db('time', start))} "
+        f"AND time < {parameters(to_db('time', finish))} GROUP BY bucket",
+        parameters.values,
+    )
+    return {to_bucket_time(row["bucket"]): row for row in rows}
+
+
+def rollup_rows(sensor_id: str, resolution: int, aggregates: dict) -> list[tuple]:
+    return [
+        (uuid4(), sensor_id, resolution, bucket, *(row[key] for key in COLUMNS[4:]))
+        for bucket, row in aggregates.items()
+    ]
+
+
+async def recompute_rollups(sensor_id: str, resolution: int, buckets: set[datetime]):
+    aggregates = {}
+    for start, finish in bucket_ranges(buckets, resolution):
+        aggregates.update(await rollup_aggregates(sensor_id, resolution, start, finish))
+    aggregates = {
+        bucket: row for bucket, row in aggregates.items() if bucket in buckets
+    }
+    if aggregates:
+        await upsert_rollups(
+            rollup_rows(sensor_id, resolution, aggregates), combine=False
+        )
+    if empty := buckets - aggregates.keys():
+        await MeasurementRollup.filter(
+            sensor_id=sensor_id, resolution=resolution, time__in=list(empty)
+        ).delete()
+
+
+async def backfill_rollups(
+    position: str | None, save_position: Callable[[str], Awaitable[None]]
+) -> None:
+    done_sensor, _, next_window = (position or "").partition("|")
+    sensors = await get_connection().execute_query_dict(
+        'SELECT sensor_id, MIN("time") AS first, MAX("time") AS last '
+        "FROM measurement GROUP BY sensor_id"
+    )
+    for sensor in sorted(sensors, key=lambda sensor: str(sensor["sensor_id"])):
+        sensor_id = str(sensor["sensor_id"])
+        if sensor_id < done_sensor:
+            continue
+        start = bucket_start(
+            to_python_value(Measurement, "time", sensor["first"]),
+            ROLLUP_RESOLUTIONS[-1],
+        )
+        if sensor_id == done_sensor:
+            start = max(start, datetime.fromisoformat(next_window))
+        last = to_python_value(Measurement, "time", sensor["last"])
+        while start <= last:
+            finish = start + BACKFILL_WINDOW
+            async with in_transaction():
+                for resolution in ROLLUP_RESOLUTIONS:
+                    aggregates = await rollup_aggregates(
+                        sensor_id, resolution, start, finish
+                    )
+                    rows = rollup_rows(sensor_id, resolution, aggregates)
+                    for offset in range(0, len(rows), 500):
+                        await upsert_rollups(rows[offset : offset + 500], combine=False)
+                await save_position(f"{sensor_id}|{finish.isoformat()}")
+            start = finish
+
+
+async def refresh_rollups(keys: Iterable[tuple[str, datetime]]) -> None:
+    buckets_by_sensor: dict[str, set[datetime]] = {}
+    for sensor_id, time in keys:
+        buckets_by_sensor.setdefault(str(sensor_id), set()).add(time)
+    for sensor_id, times in buckets_by_sensor.items():
+        for resolution in ROLLUP_RESOLUTIONS:
+            buckets = {bucket_start(time, resolution) for time in times}
+            await recompute_rollups(sensor_id, resolution, buckets)
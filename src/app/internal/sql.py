@@ -0,0 +1,30 @@
+from typing import Any
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.models import Model
+
+
+def get_connection() -> BaseDBAsyncClient:
+    return connections.get("default")
+
+
+def to_db_value(model: type[Model], field_name: str, value: Any) -> Any:
+    field = model._meta.fields_map[field_name]
+    override = model._meta.db.executor_class.TO_DB_OVERRIDE.get(field.__class__)
+    if override:
+        return override(field, value, model)
+    return field.to_db_value(value, model)
+
+
+class Parameters:
+    def __init__(self, dialect: str):
+        self.dialect = dialect
+        self.values = []
+
+    def __call__(self, value: Any) -> str:
+        self.values.append(value)
+        return "?" if self.dialect == "sqlite" else f"${len(self.values)}"
+
+
+def to_python_value(model: type[Model], field_name: str, value: Any) -> Any:
+    return model._meta.fields_map[field_name].to_python_value(value)
@@ -1,7 +1,13 @@
+import asyncio
+from os import getenv
+from time import monotonic
+from dns.exception import DNSException
+from dns.resolver import Resolver
 from tortoise.validators import Validator
 from tortoise.exceptions import ValidationError
 from password_strength import PasswordPolicy
 from email_validator import validate_email, EmailNotValidError
+from email_validator.deliverability import validate_email_deliverability
 
 
 class PasswordValidator(Validator):
@@ -40,6 +46,72 @@ class PasswordValidator(Validator):
 class EmailValidator(Validator):
     def __call__(self, value: str):
         try:
-            validate_email(value, check_deliverability=True)
+            validate_email(value, check_deliverability=False)
         except EmailNotValidError as exc:
             raise ValidationError(f"email: {str(exc)}")
+
+
+class DeliverabilityChecker:
+    def __init__(self, offline: bool, ttl_seconds: float, timeout: float):
+        self.offline = offline
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._cache: dict[str, tuple[float, str | None]] = {}
+        self._resolver: Resolver | None = None
+
+    @classmethod
+    def from_env(cls) -> "DeliverabilityChecker":
+        return cls(
+            offline=getenv("EMAIL_DELIVERABILITY_OFFLINE", "").lower() in ("1", "true"),
+            ttl_seconds=float(getenv("EMAIL_DELIVERABILITY_TTL_SECONDS") or 3600),
+            timeout=float(getenv("EMAIL_DELIVERABILITY_TIMEOUT") or 2),
+        )
+
+    def _lookup(self, domain: str, domain_i18n: str) -> str | None:
+        if self._resolver is None:
+            self._resolver = Resolver()
+            self._resolver.lifetime = self.timeout
+        try:
+            info = validate_email_deliverability(
+                domain, domain_i18n, dns_resolver=self._resolver
+            )
+        except EmailNotValidError as exc:
+            return str(exc)
+        if "unknown-deliverability" in info:
+            raise TimeoutError(info["unknown-deliverability"])
+        return None
+
+    async def check(self, value: str) -> None:
+        try:
+            email = validate_email(value, check_deliverability=False)
+        except EmailNotValidError as exc:
+            raise ValidationError(f"email: {str(exc)}")
+        if self.offline:
+            return
+        domain = email.ascii_domain
+        cached = self._cache.get(domain)
+        if cached and cached[0] > monotonic():
+            self.hits += 1
+            error = cached[1]
+        else:
+            self.misses += 1
+            try:
+                error = await asyncio.to_thread(self._lookup, domain, email.domain)
+            except (DNSException, TimeoutError):
+                return
+            self._cache[domain] = (monotonic() + self.ttl_seconds, error)
+        if error:
+            raise ValidationError(f"email: {error}")
+
+    def metrics(self) -> dict:
+        return {
+            "offline": self.offline,
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+email_deliverability = DeliverabilityChecker.from_env()
@@ -0,0 +1,10 @@
+from tortoise.expressions import Q
+
+
+def visible_to(
+    user_id: str, shared: str, include_shared: bool = True, prefix: str = ""
+) -> Q:
+    owned = Q(**{f"{prefix}user_id": user_id})
+    if not include_shared:
+        return owned
+    return owned | Q(**{f"{prefix}{shared}": True})
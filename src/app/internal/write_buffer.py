@@ -0,0 +1,97 @@
+import asyncio
+from os import getenv
+from time import perf_counter
+from tortoise.transactions import in_transaction
+from app.internal.latest import update_latest
+from app.internal.rollups import add_to_rollups
+from app.models import Measurement
+
+
+class WriteBuffer:
+    def __init__(self, enabled: bool, max_rows: int, max_latency_ms: float):
+        self.enabled = enabled
+        self.max_rows = max_rows
+        self.max_latency = max_latency_ms / 1000
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    @classmethod
+    def from_env(cls) -> "WriteBuffer":
+        return cls(
+            enabled=getenv("WRITE_BUFFER_ENABLED", "").lower() in ("1", "true"),
+            max_rows=int(getenv("WRITE_BUFFER_MAX_ROWS") or 500),
+            max_latency_ms=float(getenv("WRITE_BUFFER_MAX_LATENCY_MS") or 20),
+        )
+
+    async def submit(self, measurement: Measurement) -> Measurement:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((measurement, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: list) -> None:
+        start = perf_counter()
+        try:
+            async with in_transaction():
+                measurements = [measurement for measurement, _ in batch]
+                await Measurement.bulk_create(measurements)
+                await add_to_rollups(measurements)
+                await update_latest(measurements)
+        except Exception:
+            for measurement, future in batch:
+                try:
+                    async with in_transaction():
+                        await measurement.save(force_create=True)
+                        await add_to_rollups([measurement])
+                        await update_latest([measurement])
+                except Exception as exc:
+                    if not future.done():
+                        future.set_exception(exc)
+                else:
+                    if not future.done():
+                        future.set_result(measurement)
+        else:
+            for measurement, future in batch:
+                if not future.done():
+                    future.set_result(measurement)
+
+        elapsed_ms = (perf_counter() - start) * 1000
+        self.flushes += 1
+        self.flushed_rows += len(batch)
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": self.max_flush_ms,
+        }
+
+
+write_buffer = WriteBuffer.from_env()
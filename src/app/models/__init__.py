@@ -2,5 +2,16 @@ from app.models.measurement import Measurement
 from app.models.sensor import Sensor
 from app.models.user import User
 from app.models.device import Device
+from app.models.device_key import DeviceKey
+from app.models.rollup import MeasurementRollup
+from app.models.latest import LatestMeasurement
 
-__models__ = [Device, Measurement, Sensor, User]
+__models__ = [
+    Device,
+    DeviceKey,
+    LatestMeasurement,
+    Measurement,
+    MeasurementRollup,
+    Sensor,
+    User,
+]
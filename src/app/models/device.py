@@ -1,4 +1,5 @@
 from tortoise import fields
+from tortoise.validators import MinValueValidator
 from .abstract import AbstractBaseModel
 from .user import User
 
@@ -9,7 +10,10 @@ class Device(AbstractBaseModel):
     )
     name = fields.CharField(min_length=2, max_length=32)
     is_shared = fields.BooleanField(default=False)
+    retention_days = fields.IntField(null=True, validators=[MinValueValidator(1)])
     sensors = fields.ReverseRelation["Sensor"]
+    keys = fields.ReverseRelation["DeviceKey"]
 
     class Meta:
         unique_together = (("name", "user"),)
+        indexes = (("user",),)
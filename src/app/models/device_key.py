@@ -0,0 +1,16 @@
+from tortoise import fields
+from .abstract import AbstractBaseModel
+from .device import Device
+
+
+class DeviceKey(AbstractBaseModel):
+    name = fields.CharField(max_length=32, null=True)
+    digest = fields.CharField(max_length=64)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    revoked_at = fields.DatetimeField(null=True)
+    device: fields.ForeignKeyRelation[Device] = fields.ForeignKeyField(
+        "app.Device", "keys", fields.CASCADE
+    )
+
+    class Meta:
+        indexes = (("device",),)
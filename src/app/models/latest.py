@@ -0,0 +1,11 @@
+from tortoise import fields
+from .abstract import AbstractBaseModel
+from .sensor import Sensor
+
+
+class LatestMeasurement(AbstractBaseModel):
+    time = fields.DatetimeField()
+    value = fields.FloatField()
+    sensor: fields.OneToOneRelation[Sensor] = fields.OneToOneField(
+        "app.Sensor", False, fields.CASCADE
+    )
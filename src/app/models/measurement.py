@@ -16,3 +16,4 @@ class Measurement(AbstractBaseModel):
 
     class Meta:
         unique_together = (("time", "sensor"),)
+        indexes = (("sensor", "time"), ("user", "time"), ("value",))
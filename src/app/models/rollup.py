@@ -0,0 +1,18 @@
+from tortoise import fields
+from .abstract import AbstractBaseModel
+from .sensor import Sensor
+
+
+class MeasurementRollup(AbstractBaseModel):
+    sensor: fields.ForeignKeyRelation[Sensor] = fields.ForeignKeyField(
+        "app.Sensor", False, fields.CASCADE
+    )
+    resolution = fields.IntField()
+    time = fields.DatetimeField()
+    minimum = fields.FloatField()
+    maximum = fields.FloatField()
+    total = fields.FloatField()
+    count = fields.IntField()
+
+    class Meta:
+        unique_together = (("sensor", "resolution", "time"),)
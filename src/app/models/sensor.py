@@ -1,4 +1,5 @@
 from tortoise import fields
+from tortoise.validators import MinValueValidator
 from .user import User
 from .abstract import AbstractBaseModel
 from .device import Device
@@ -7,6 +8,7 @@ from .device import Device
 class Sensor(AbstractBaseModel):
     name = fields.CharField(min_length=2, max_length=32)
     unit = fields.CharField(max_length=32, null=True)
+    retention_days = fields.IntField(null=True, validators=[MinValueValidator(1)])
     measurements = fields.ReverseRelation["Measurement"]
     device: fields.ForeignKeyRelation[Device] = fields.ForeignKeyField(
         "app.Device", "sensors", fields.CASCADE
@@ -17,3 +19,4 @@ class Sensor(AbstractBaseModel):
 
     class Meta:
         unique_together = (("name", "device"),)
+        indexes = (("user",), ("device",))
@@ -1,6 +1,10 @@
-from argon2 import PasswordHasher
 from tortoise import fields
-from app.internal.validators import PasswordValidator, EmailValidator
+from app.internal.passwords import password_pool
+from app.internal.validators import (
+    PasswordValidator,
+    EmailValidator,
+    email_deliverability,
+)
 from .abstract import AbstractBaseModel
 from tortoise.validators import MinLengthValidator
 
@@ -16,9 +20,9 @@ class User(AbstractBaseModel):
     measurements = fields.ReverseRelation["Measurement"]
 
     async def save(self, *args, **kwargs):
-        password_hasher = PasswordHasher()
         if self.password:
-            self.password = password_hasher.hash(self.password)
+            self.password = await password_pool.hash(self.password)
         if self.email:
             self.email = self.email.lower()
+            await email_deliverability.check(self.email)
         await super().save(*args, **kwargs)
@@ -1,5 +1,9 @@
+from datetime import datetime
+from uuid import UUID
+from pydantic import BaseModel
 from tortoise.contrib.pydantic import pydantic_model_creator, pydantic_queryset_creator
-from app.models import Device
+from app.models import Device, DeviceKey
+from app.pydantics.measurement import MeasurementOutPydantic
 
 DeviceInPydantic = pydantic_model_creator(
     Device,
@@ -19,11 +23,52 @@ DeviceInOptionalPydantic = pydantic_model_creator(
 DeviceOutPydantic = pydantic_model_creator(
     Device,
     name="DeviceOut",
-    exclude=("sensors", "user", "user_id"),
+    exclude=("sensors", "keys", "user", "user_id"),
 )
 
 DevicesOutPydantic = pydantic_queryset_creator(
     Device,
     name="DevicesOut",
-    exclude=("sensors", "user", "user_id"),
+    exclude=("sensors", "keys", "user", "user_id"),
 )
+
+DeviceKeyInPydantic = pydantic_model_creator(
+    DeviceKey,
+    name="DeviceKeyIn",
+    exclude_readonly=True,
+    exclude=("uuid", "digest", "revoked_at", "device_id"),
+)
+
+DeviceKeyOutPydantic = pydantic_model_creator(
+    DeviceKey,
+    name="DeviceKeyOut",
+    exclude=("digest", "device"),
+)
+
+DeviceKeysOutPydantic = pydantic_queryset_creator(
+    DeviceKey,
+    name="DeviceKeysOut",
+    exclude=("digest", "device"),
+)
+
+
+class DeviceKeyCreatedPydantic(BaseModel):
+    uuid: UUID
+    name: str | None
+    created_at: datetime
+    device_id: UUID
+    key: str
+
+
+class SensorTreePydantic(BaseModel):
+    uuid: UUID
+    name: str
+    unit: str | None
+    measurements: list[MeasurementOutPydantic]
+
+
+class DeviceTreePydantic(BaseModel):
+    uuid: UUID
+    name: str
+    is_shared: bool
+    sensors: list[SensorTreePydantic]
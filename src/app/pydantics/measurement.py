@@ -1,3 +1,7 @@
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+from pydantic import BaseModel
 from tortoise.contrib.pydantic import pydantic_model_creator, pydantic_queryset_creator
 from app.models import Measurement
 
@@ -16,6 +20,10 @@ MeasurementInOptionalPydantic = pydantic_model_creator(
     optional=("time", "value"),
 )
 
+MeasurementsBatchInPydantic = dict[UUID, list[MeasurementInPydantic]]
+
+ConflictMode = Literal["error", "skip", "update"]
+
 MeasurementOutPydantic = pydantic_model_creator(
     Measurement,
     name="MeasurementOut",
@@ -27,3 +35,46 @@ MeasurementsOutPydantic = pydantic_queryset_creator(
     name="MeasurementsOut",
     exclude=("sensor", "sensor_id", "user", "user_id"),
 )
+
+
+class MeasurementStatusPydantic(BaseModel):
+    uuid: UUID | None
+    time: datetime
+    value: float
+    status: Literal["created", "updated", "conflict"]
+
+
+class MeasurementsBulkOutPydantic(BaseModel):
+    created: int
+    updated: int
+    conflicts: int
+    measurements: list[MeasurementStatusPydantic]
+
+
+class MeasurementLineErrorPydantic(BaseModel):
+    line: int
+    msg: str
+
+
+class MeasurementsStreamOutPydantic(BaseModel):
+    accepted: int
+    updated: int
+    conflicts: int
+    rejected: int
+    errors: list[MeasurementLineErrorPydantic]
+
+
+class MeasurementBucketPydantic(BaseModel):
+    time: datetime
+    min: float
+    max: float
+    avg: float
+    sum: float
+    count: int
+
+
+class MeasurementLatestPydantic(BaseModel):
+    uuid: UUID
+    sensor_uuid: UUID
+    time: datetime
+    value: float
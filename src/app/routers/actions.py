@@ -1,8 +1,12 @@
-from argon2 import PasswordHasher
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Annotated
-from app.internal.authentication import Token
+from app.internal.authentication import Token, authorize, token_cache
+from app.internal.device_keys import device_key_index
+from app.internal.passwords import password_pool
+from app.internal.validators import email_deliverability
+from app.internal.write_buffer import write_buffer
+from app.startup.retention import retention_pruner
 from app.models import User
 
 router = APIRouter(
@@ -11,12 +15,36 @@ router = APIRouter(
 )
 
 
+async def rehash_password(user: User, password: str) -> None:
+    hashed = await password_pool.hash(password)
+    if await User.filter(uuid=user.uuid, password=user.password).update(
+        password=hashed
+    ):
+        password_pool.rehashed += 1
+
+
 @router.post("/token")
-async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+async def login(
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    background_tasks: BackgroundTasks,
+):
     user = await User.get(username=form_data.username)
-    password_hasher = PasswordHasher()
-    password_hasher.verify(user.password, form_data.password)
+    await password_pool.verify(user.password, form_data.password)
+    if password_pool.needs_rehash(user.password):
+        background_tasks.add_task(rehash_password, user, form_data.password)
     data = {"uuid": str(user.uuid)}
     token = Token.encode_token(data)
     token_json = {"token_type": "bearer", "access_token": token}
     return token_json
+
+
+@router.get("/metrics")
+async def metrics(user_id: Annotated[dict, Depends(authorize)]):
+    return {
+        "write_buffer": write_buffer.metrics(),
+        "retention": retention_pruner.metrics(),
+        "passwords": password_pool.metrics(),
+        "email_deliverability": email_deliverability.metrics(),
+        "tokens": token_cache.metrics(),
+        "device_keys": device_key_index.metrics(),
+    }
@@ -1,13 +1,23 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from app.internal.authentication import authorize
+from app.internal.device_keys import device_key_index
+from app.internal.latest import latest_readings
+from app.internal.visibility import visible_to
+from app.internal.fields import field_selector, select, rows_response
+from app.startup.migrations import LATEST_BACKFILL, is_applied
 from tortoise.transactions import in_transaction
-from app.models import Device
+from app.models import Device, DeviceKey
 from app.pydantics.device import (
     DeviceOutPydantic,
     DeviceInPydantic,
     DevicesOutPydantic,
     DeviceInOptionalPydantic,
+    DeviceTreePydantic,
+    DeviceKeyInPydantic,
+    DeviceKeyOutPydantic,
+    DeviceKeysOutPydantic,
+    DeviceKeyCreatedPydantic,
 )
 
 router = APIRouter(
@@ -15,10 +25,13 @@ router = APIRouter(
     tags=["devices"],
 )
 
+MAX_TREE_READINGS = 1000
+
 
 @router.get("/", response_model=DevicesOutPydantic)
 async def get_device(
     user_id: Annotated[dict, Depends(authorize)],
+    fields: Annotated[tuple[str, ...], Depends(field_selector(DeviceOutPydantic))],
     uuid: str = "",
     name: str = "",
     is_shared: bool | None = None,
@@ -29,12 +42,73 @@ async def get_device(
         "is_shared": is_shared,
     }
     params = {key: value for key, value in params_template.items() if value}
-    async with in_transaction():
-        devices = await Device.filter(user_id=user_id, **params)
-        if not devices and is_shared is not False and uuid:
-            params["is_shared"] = True
-            devices = await Device.filter(**params)
-        return devices
+    visibility = visible_to(user_id, "is_shared", bool(uuid) and is_shared is not False)
+    devices = await select(Device.filter(visibility, **params), fields)
+    return rows_response(devices, DeviceOutPydantic, fields)
+
+
+@router.get("/{uuid}/tree", response_model=DeviceTreePydantic)
+async def get_device_tree(
+    user_id: Annotated[dict, Depends(authorize)],
+    uuid: str,
+    readings: Annotated[int, Query(ge=0, le=MAX_TREE_READINGS)] = 1,
+):
+    device = await Device.get(
+        visible_to(user_id, "is_shared"), uuid=uuid
+    ).prefetch_related("sensors")
+    measurements = {}
+    if readings:
+        measurements = await latest_readings(
+            uuid, readings, is_applied(LATEST_BACKFILL)
+        )
+    return {
+        "uuid": device.uuid,
+        "name": device.name,
+        "is_shared": device.is_shared,
+        "sensors": [
+            {
+                "uuid": sensor.uuid,
+                "name": sensor.name,
+                "unit": sensor.unit,
+                "measurements": measurements.get(str(sensor.uuid), []),
+            }
+            for sensor in sorted(device.sensors, key=lambda sensor: sensor.name)
+        ],
+    }
+
+
+@router.get("/{uuid}/keys", response_model=DeviceKeysOutPydantic)
+async def get_device_keys(user_id: Annotated[dict, Depends(authorize)], uuid: str):
+    device = await Device.get(uuid=uuid, user_id=user_id)
+    return await DeviceKey.filter(device=device).order_by("created_at")
+
+
+@router.post("/{uuid}/keys", response_model=DeviceKeyCreatedPydantic)
+async def create_device_key(
+    user_id: Annotated[dict, Depends(authorize)],
+    uuid: str,
+    key_in: DeviceKeyInPydantic,
+):
+    device = await Device.get(uuid=uuid, user_id=user_id)
+    key, plain_key = await device_key_index.create(device, key_in.name)
+    return {
+        "uuid": key.uuid,
+        "name": key.name,
+        "created_at": key.created_at,
+        "device_id": device.uuid,
+        "key": plain_key,
+    }
+
+
+@router.delete("/{uuid}/keys/{key_uuid}", response_model=DeviceKeyOutPydantic)
+async def revoke_device_key(
+    user_id: Annotated[dict, Depends(authorize)], uuid: str, key_uuid: str
+):
+    key = await DeviceKey.get(
+        uuid=key_uuid, device_id=uuid, device__user_id=user_id, revoked_at=None
+    )
+    await device_key_index.revoke(key)
+    return key
 
 
 @router.post("/", response_model=DeviceOutPydantic)
@@ -79,4 +153,5 @@ async def remove_device(user_id: Annotated[dict, Depends(authorize)], uuid: str)
     async with in_transaction():
         device = await Device.get(uuid=uuid, user_id=user_id)
         await device.delete()
-        return device
+    device_key_index.discard(device_id=str(device.uuid))
+    return device
@@ -1,15 +1,52 @@
 from datetime import datetime
-from typing import Annotated
-from fastapi import APIRouter, Depends
+from uuid import UUID
+from typing import Annotated, Literal
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from app.internal.authentication import authorize
+from app.internal.device_keys import Ingester, authorize_ingest
+from app.internal.ingest import (
+    check_sensors,
+    ingest_stream,
+    insert_measurements,
+    to_utc,
+)
+from app.internal.aggregation import (
+    BUCKET_PATTERN,
+    aggregate_measurements,
+    bucket_seconds,
+)
+from app.internal.downsampling import downsample_measurements
+from app.internal.fields import field_selector, select, rows_response
+from app.internal.export import (
+    MEDIA_TYPES,
+    ColumnarFormat,
+    ExportFormat,
+    columnar_measurements,
+    export_measurements,
+)
+from app.internal.latest import refresh_latest, update_latest
+from app.internal.rollups import add_to_rollups, refresh_rollups
+from app.internal.pagination import next_cursor, paginate
+from app.internal.visibility import visible_to
+from app.internal.write_buffer import write_buffer
+from app.startup.migrations import ROLLUPS_BACKFILL, is_applied
+from tortoise.exceptions import ValidationError
+from tortoise.queryset import QuerySet
 from tortoise.transactions import in_transaction
 
-from app.models import Measurement
+from app.models import LatestMeasurement, Measurement, Sensor
 from app.pydantics.measurement import (
     MeasurementsOutPydantic,
     MeasurementOutPydantic,
     MeasurementInOptionalPydantic,
     MeasurementInPydantic,
+    MeasurementsBulkOutPydantic,
+    MeasurementsBatchInPydantic,
+    MeasurementsStreamOutPydantic,
+    MeasurementBucketPydantic,
+    MeasurementLatestPydantic,
+    ConflictMode,
 )
 
 router = APIRouter(
@@ -17,17 +54,17 @@ router = APIRouter(
     tags=["measurements"],
 )
 
+MAX_PAGE_SIZE = 10000
 
-@router.get("/", response_model=MeasurementsOutPydantic)
-async def get_measurement(
-    user_id: Annotated[dict, Depends(authorize)],
+
+def measurement_filters(
     sensor_uuid: str = "",
     uuid: str = "",
     start_time: datetime | None = None,
     finish_time: datetime | None = None,
     min_value: float | None = None,
     max_value: float | None = None,
-):
+) -> dict:
     parameters = {
         "uuid": uuid,
         "sensor_id": sensor_uuid,
@@ -36,24 +73,185 @@ async def get_measurement(
         "value__gte": min_value,
         "value__lte": max_value,
     }
-    filtered_parameters = {key: value for key, value in parameters.items() if value}
-    async with in_transaction():
-        measurements = await Measurement.filter(user_id=user_id, **filtered_parameters)
-        if not measurements and uuid or sensor_uuid:
-            measurements = await Measurement.filter(
-                **filtered_parameters, sensor__device__is_shared=True
-            )
-        return measurements
+    return {key: value for key, value in parameters.items() if value}
 
 
-@router.post("/{sensor_uuid}", response_model=MeasurementOutPydantic)
-async def create_measurement(
+def visible_measurements(user_id: str, filters: dict) -> QuerySet:
+    include_shared = "uuid" in filters or "sensor_id" in filters
+    visibility = visible_to(user_id, "sensor__device__is_shared", include_shared)
+    return Measurement.filter(visibility, **filters)
+
+
+@router.get("/", response_model=MeasurementsOutPydantic)
+async def get_measurement(
+    user_id: Annotated[dict, Depends(authorize)],
+    filters: Annotated[dict, Depends(measurement_filters)],
+    fields: Annotated[tuple[str, ...], Depends(field_selector(MeasurementOutPydantic))],
+    limit: Annotated[int | None, Query(ge=1, le=MAX_PAGE_SIZE)] = None,
+    cursor: str = "",
+    max_points: Annotated[int | None, Query(ge=3)] = None,
+):
+    headers = {}
+    if max_points:
+        if limit or cursor:
+            raise ValidationError("max_points: can't be combined with limit or cursor")
+        measurements = await downsample_measurements(
+            visible_measurements(user_id, filters), max_points
+        )
+    else:
+        measurements = await select(
+            paginate(visible_measurements(user_id, filters), limit, cursor),
+            fields,
+            "time",
+            "uuid",
+        )
+        if cursor := next_cursor(measurements, limit):
+            headers["X-Next-Cursor"] = cursor
+    return rows_response(measurements, MeasurementOutPydantic, fields, headers)
+
+
+@router.get("/export")
+async def export_measurement(
+    user_id: Annotated[dict, Depends(authorize)],
+    filters: Annotated[dict, Depends(measurement_filters)],
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "ndjson",
+):
+    measurements = visible_measurements(user_id, filters)
+    return StreamingResponse(
+        export_measurements(measurements, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f"attachment; filename=measurements.{export_format}"
+        },
+    )
+
+
+@router.get("/columns")
+async def get_measurement_columns(
+    user_id: Annotated[dict, Depends(authorize)],
+    filters: Annotated[dict, Depends(measurement_filters)],
+    columnar_format: Annotated[ColumnarFormat, Query(alias="format")] = "json",
+):
+    measurements = visible_measurements(user_id, filters)
+    content, count = await columnar_measurements(measurements, columnar_format)
+    return Response(
+        content,
+        media_type=MEDIA_TYPES[columnar_format],
+        headers={"X-Row-Count": str(count)},
+    )
+
+
+@router.get("/aggregate", response_model=list[MeasurementBucketPydantic])
+async def aggregate_measurement(
     user_id: Annotated[dict, Depends(authorize)],
     sensor_uuid: str,
+    bucket: Annotated[str, Query(pattern=BUCKET_PATTERN)] = "1h",
+    start_time: datetime | None = None,
+    finish_time: datetime | None = None,
+):
+    sensor = Sensor.filter(visible_to(user_id, "device__is_shared"), uuid=sensor_uuid)
+    if not await sensor.exists():
+        return []
+    return await aggregate_measurements(
+        sensor_uuid,
+        bucket_seconds(bucket),
+        start_time,
+        finish_time,
+        is_applied(ROLLUPS_BACKFILL),
+    )
+
+
+@router.get("/latest", response_model=list[MeasurementLatestPydantic])
+async def get_latest_measurement(
+    user_id: Annotated[dict, Depends(authorize)],
+    device_uuid: str = "",
+    sensor_uuid: Annotated[list[str], Query()] = [],
+):
+    include_shared = bool(device_uuid or sensor_uuid)
+    latest = LatestMeasurement.filter(
+        visible_to(user_id, "device__is_shared", include_shared, "sensor__")
+    )
+    if device_uuid:
+        latest = latest.filter(sensor__device_id=device_uuid)
+    if sensor_uuid:
+        latest = latest.filter(sensor_id__in=sensor_uuid)
+    return await latest.order_by("sensor_id").values(
+        "uuid", "time", "value", sensor_uuid="sensor_id"
+    )
+
+
+@router.post("/batch", response_model=MeasurementsBulkOutPydantic)
+async def create_measurements_batch(
+    ingester: Annotated[Ingester, Depends(authorize_ingest)],
+    batch: MeasurementsBatchInPydantic,
+    on_conflict: ConflictMode = "skip",
+):
+    user_id = ingester.user_id
+    await check_sensors(
+        {str(sensor_uuid) for sensor_uuid in batch}, user_id, ingester.device_id
+    )
+    readings = [
+        {**measurement.model_dump(), "sensor_id": sensor_uuid}
+        for sensor_uuid, measurements in batch.items()
+        for measurement in measurements
+    ]
+    return await insert_measurements(readings, user_id, on_conflict)
+
+
+@router.post("/{sensor_uuid}", response_model=MeasurementOutPydantic)
+async def create_measurement(
+    ingester: Annotated[Ingester, Depends(authorize_ingest)],
+    sensor_uuid: UUID,
     measurement: MeasurementInPydantic,
+    on_conflict: ConflictMode = "error",
+):
+    user_id = ingester.user_id
+    if ingester.device_id or on_conflict != "error":
+        await check_sensors({str(sensor_uuid)}, user_id, ingester.device_id)
+    if on_conflict == "error":
+        record = Measurement(
+            **measurement.model_dump(), sensor_id=sensor_uuid, user_id=user_id
+        )
+        if write_buffer.enabled:
+            return await write_buffer.submit(record)
+        async with in_transaction():
+            await record.save(force_create=True)
+            await add_to_rollups([record])
+            await update_latest([record])
+        return record
+    reading = {**measurement.model_dump(), "sensor_id": sensor_uuid}
+    await insert_measurements([reading], user_id, on_conflict)
+    return await Measurement.get(sensor_id=sensor_uuid, time=to_utc(measurement.time))
+
+
+@router.post("/{sensor_uuid}/bulk", response_model=MeasurementsBulkOutPydantic)
+async def create_measurements(
+    ingester: Annotated[Ingester, Depends(authorize_ingest)],
+    sensor_uuid: UUID,
+    measurements: list[MeasurementInPydantic],
+    on_conflict: ConflictMode = "skip",
+):
+    user_id = ingester.user_id
+    await check_sensors({str(sensor_uuid)}, user_id, ingester.device_id)
+    readings = [
+        {**measurement.model_dump(), "sensor_id": sensor_uuid}
+        for measurement in measurements
+    ]
+    return await insert_measurements(readings, user_id, on_conflict)
+
+
+@router.post("/{sensor_uuid}/stream", response_model=MeasurementsStreamOutPydantic)
+async def create_measurements_stream(
+    ingester: Annotated[Ingester, Depends(authorize_ingest)],
+    sensor_uuid: UUID,
+    request: Request,
+    on_conflict: Literal["skip", "update"] = "skip",
 ):
-    return await Measurement.create(
-        **measurement.model_dump(), sensor_id=sensor_uuid, user_id=user_id
+    user_id = ingester.user_id
+    await check_sensors({str(sensor_uuid)}, user_id, ingester.device_id)
+    is_csv = request.headers.get("content-type", "").startswith("text/csv")
+    return await ingest_stream(
+        request.stream(), str(sensor_uuid), user_id, is_csv, on_conflict
     )
 
 
@@ -66,9 +264,12 @@ async def edit_measurement(
     measurement_dict = measurement_in.model_dump(exclude_none=True, exclude_unset=True)
     async with in_transaction():
         measurement = await Measurement.get(uuid=uuid, user_id=user_id)
+        previous = (measurement.sensor_id, measurement.time)
         await measurement.update_from_dict(measurement_dict).save(
             update_fields=measurement_dict.keys()
         )
+        await refresh_rollups([previous, (measurement.sensor_id, measurement.time)])
+        await refresh_latest([measurement.sensor_id])
         return measurement
 
 
@@ -81,9 +282,12 @@ async def edit_measurement(
     measurement_dict = measurement_in.model_dump(exclude_none=True, exclude_unset=True)
     async with in_transaction():
         measurement = await Measurement.get(uuid=uuid, user_id=user_id)
+        previous = (measurement.sensor_id, measurement.time)
         await measurement.update_from_dict(measurement_dict).save(
             update_fields=measurement_dict.keys()
         )
+        await refresh_rollups([previous, (measurement.sensor_id, measurement.time)])
+        await refresh_latest([measurement.sensor_id])
         return measurement
 
 
@@ -92,4 +296,6 @@ async def remove_measurement(user_id: Annotated[dict, Depends(authorize)], uuid:
     async with in_transaction():
         measurement = await Measurement.get(uuid=uuid, user_id=user_id)
         await measurement.delete()
+        await refresh_rollups([(measurement.sensor_id, measurement.time)])
+        await refresh_latest([measurement.sensor_id])
         return measurement
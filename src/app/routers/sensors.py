@@ -1,6 +1,8 @@
 from typing import Annotated
 from fastapi import APIRouter, Depends
 from app.internal.authentication import authorize
+from app.internal.visibility import visible_to
+from app.internal.fields import field_selector, select, rows_response
 from tortoise.transactions import in_transaction
 from app.models import Sensor
 from app.pydantics.sensor import (
@@ -19,6 +21,7 @@ router = APIRouter(
 @router.get("/", response_model=SensorsOutPydantic)
 async def get_sensor(
     user_id: Annotated[dict, Depends(authorize)],
+    fields: Annotated[tuple[str, ...], Depends(field_selector(SensorOutPydantic))],
     device_uuid: str = "",
     uuid: str = "",
     name: str = "",
@@ -31,11 +34,9 @@ async def get_sensor(
         "unit__contains": unit,
     }
     params = {key: value for key, value in params_template.items() if value}
-    async with in_transaction():
-        sensors = await Sensor.filter(user_id=user_id, **params)
-        if not sensors and (uuid or device_uuid):
-            sensors = await Sensor.filter(**params, device__is_shared=True)
-        return sensors
+    visibility = visible_to(user_id, "device__is_shared", bool(uuid or device_uuid))
+    sensors = await select(Sensor.filter(visibility, **params), fields)
+    return rows_response(sensors, SensorOutPydantic, fields)
 
 
 @router.post("/{device_uuid}", response_model=SensorOutPydantic)
@@ -2,6 +2,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends
 from tortoise.transactions import in_transaction
 from ..internal.authentication import authorize
+from ..internal.device_keys import device_key_index
 from ..models.user import User
 from ..pydantics.user import (
     UserInPydantic,
@@ -51,4 +52,5 @@ async def remove_user(uuid: Annotated[dict, Depends(authorize)]):
     async with in_transaction():
         user = await User.get(uuid=uuid)
         await user.delete()
-        return user
+    device_key_index.discard(user_id=str(user.uuid))
+    return user
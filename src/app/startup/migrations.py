@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from functools import partial
+from tortoise.transactions import in_transaction
+from app.internal.latest import backfill_latest
+from app.internal.rollups import backfill_rollups
+from app.internal.sql import Parameters, get_connection
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_TABLE = (
+    "CREATE TABLE IF NOT EXISTS schema_version ("
+    "version INT NOT NULL PRIMARY KEY, "
+    "name VARCHAR(64) NOT NULL, "
+    "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+)
+
+BACKFILL_PROGRESS_TABLE = (
+    "CREATE TABLE IF NOT EXISTS backfill_progress ("
+    "version INT NOT NULL PRIMARY KEY, "
+    "position VARCHAR(128) NOT NULL)"
+)
+
+MEASUREMENT_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS "idx_measurement_sensor__c5882f" '
+    'ON "measurement" ("sensor_id", "time")',
+    'CREATE INDEX IF NOT EXISTS "idx_measurement_user_id_0bd6b3" '
+    'ON "measurement" ("user_id", "time")',
+    'CREATE INDEX IF NOT EXISTS "idx_measurement_value_dcc070" '
+    'ON "measurement" ("value")',
+]
+
+MEASUREMENT_BRIN_INDEX = (
+    'CREATE INDEX IF NOT EXISTS "brin_measurement_time" '
+    'ON "measurement" USING BRIN ("time")'
+)
+
+ROLLUPS_BACKFILL = 4
+LATEST_BACKFILL = 5
+
+MIGRATIONS = [
+    (
+        1,
+        "measurement access pattern indexes",
+        MEASUREMENT_INDEXES
+        + [
+            'CREATE INDEX IF NOT EXISTS "idx_sensor_user_id_b7dcdc" '
+            'ON "sensor" ("user_id")',
+            'CREATE INDEX IF NOT EXISTS "idx_sensor_device__f85c3f" '
+            'ON "sensor" ("device_id")',
+            'CREATE INDEX IF NOT EXISTS "idx_device_user_id_b7b3ba" '
+            'ON "device" ("user_id")',
+        ],
+        [MEASUREMENT_BRIN_INDEX],
+    ),
+    (
+        2,
+        "retention policies",
+        [],
+        [
+            'ALTER TABLE "sensor" ADD COLUMN IF NOT EXISTS "retention_days" INT',
+            'ALTER TABLE "device" ADD COLUMN IF NOT EXISTS "retention_days" INT',
+        ],
+    ),
+    (
+        3,
+        "device ingest keys",
+        [
+            'CREATE INDEX IF NOT EXISTS "idx_devicekey_device__24d048" '
+            'ON "devicekey" ("device_id")',
+        ],
+        [],
+    ),
+]
+
+BACKFILLS = [
+    (ROLLUPS_BACKFILL, "measurement rollups backfill", backfill_rollups),
+    (LATEST_BACKFILL, "latest measurements backfill", backfill_latest),
+]
+
+applied_migrations: set[int] = set()
+
+_backfills: asyncio.Task | None = None
+
+
+def is_applied(version: int) -> bool:
+    return version in applied_migrations
+
+
+async def applied_versions() -> set[int]:
+    connection = get_connection()
+    await connection.execute_script(SCHEMA_VERSION_TABLE)
+    rows = await connection.execute_query_dict("SELECT version FROM schema_version")
+    return {row["version"] for row in rows}
+
+
+async def migrate() -> list[int]:
+    dialect = get_connection().capabilities.dialect
+    applied = await applied_versions()
+    applied_migrations.update(applied)
+    migrated = []
+    for version, name, statements, postgres_statements in MIGRATIONS:
+        if version in applied:
+            continue
+        if dialect == "postgres":
+            statements = statements + postgres_statements
+        async with in_transaction() as connection:
+            for statement in statements:
+                await connection.execute_script(statement)
+            await record_version(version, name)
+        logger.info(f"applied migration {version}: {name}")
+        applied_migrations.add(version)
+        migrated.append(version)
+    return migrated
+
+
+async def record_version(version: int, name: str) -> None:
+    connection = get_connection()
+    parameters = Parameters(connection.capabilities.dialect)
+    await connection.execute_query(
+        "INSERT INTO schema_version (version, name) "
+        f"VALUES ({parameters(version)}, {parameters(name)})",
+        parameters.values,
+    )
+
+
+async def backfill_position(version: int) -> str | None:
+    connection = get_connection()
+    await connection.execute_script(BACKFILL_PROGRESS_TABLE)
+    parameters = Parameters(connection.capabilities.dialect)
+    rows = await connection.execute_query_dict(
+        f"SELECT position FROM backfill_progress WHERE version = {parameters(version)}",
+        parameters.values,
+    )
+    return rows[0]["position"] if rows else None
+
+
+async def save_position(version: int, position: str) -> None:
+    connection = get_connection()
+    parameters = Parameters(connection.capabilities.dialect)
+    await connection.execute_query(
+        "INSERT INTO backfill_progress (version, position) "
+        f"VALUES ({parameters(version)}, {parameters(position)}) "
+        "ON CONFLICT (version) DO UPDATE SET position = excluded.position",
+        parameters.values,
+    )
+
+
+async def run_backfills() -> list[int]:
+    applied = await applied_versions()
+    applied_migrations.update(applied)
+    backfilled = []
+    for version, name, backfill in BACKFILLS:
+        if version in applied:
+            continue
+        position = await backfill_position(version)
+        await backfill(position, partial(save_position, version))
+        async with in_transaction() as connection:
+            await record_version(version, name)
+            parameters = Parameters(connection.capabilities.dialect)
+            await connection.execute_query(
+                f"DELETE FROM backfill_progress WHERE version = {parameters(version)}",
+                parameters.values,
+            )
+        logger.info(f"applied migration {version}: {name}")
+        applied_migrations.add(version)
+        backfilled.append(version)
+    return backfilled
+
+
+async def _run_backfills() -> None:
+    try:
+        await run_backfills()
+    except Exception:
+        logger.exception("backfilling migrations failed")
+
+
+def start_backfills() -> None:
+    global _backfills
+    if _backfills is None or _backfills.done():
+        _backfills = asyncio.create_task(_run_backfills())
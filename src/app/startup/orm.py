@@ -2,6 +2,9 @@ from tortoise.contrib.fastapi import register_tortoise
 from os import getenv
 from fastapi import FastAPI
 import logging
+from .migrations import migrate, start_backfills
+from .partitions import setup_partitioning
+from .retention import retention_pruner
 
 logger = logging.getLogger(__name__)
 
@@ -39,3 +42,10 @@ def connect_to_db(app: FastAPI) -> None:
         generate_schemas=True,
         add_exception_handlers=True,
     )
+
+    @app.on_event("startup")
+    async def run_migrations() -> None:
+        await migrate()
+        await setup_partitioning()
+        retention_pruner.start()
+        start_backfills()
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from os import getenv
+from typing import Literal
+from tortoise.transactions import in_transaction
+from app.internal.sql import get_connection
+from app.startup.migrations import MEASUREMENT_BRIN_INDEX, MEASUREMENT_INDEXES
+
+logger = logging.getLogger(__name__)
+
+PartitionInterval = Literal["month", "week"]
+
+PARTITIONING = getenv("MEASUREMENT_PARTITIONING", "").lower()
+PARTITIONS_AHEAD = int(getenv("MEASUREMENT_PARTITIONS_AHEAD") or 3)
+PARTITIONS_CHECK_SECONDS = 6 * 3600
+
+CONVERT_STATEMENTS = [
+    'ALTER TABLE "measurement" RENAME TO "measurement_unpartitioned"',
+    'CREATE TABLE "measurement" (LIKE "measurement_unpartitioned" INCLUDING DEFAULTS) '
+    'PARTITION BY RANGE ("time")',
+    'ALTER TABLE "measurement" ADD CONSTRAINT "pk_measurement_uuid_time" '
+    'PRIMARY KEY ("uuid", "time")',
+    'ALTER TABLE "measurement" ADD CONSTRAINT "uid_measurement_time_sensor" '
+    'UNIQUE ("time", "sensor_id")',
+    'ALTER TABLE "measurement" ADD FOREIGN KEY ("sensor_id") '
+    'REFERENCES "sensor" ("uuid") ON DELETE CASCADE',
+    'ALTER TABLE "measurement" ADD FOREIGN KEY ("user_id") '
+    'REFERENCES "user" ("uuid") ON DELETE CASCADE',
+    'CREATE TABLE "measurement_default" PARTITION OF "measurement" DEFAULT',
+]
+
+COPY_STATEMENTS = [
+    'INSERT INTO "measurement" SELECT * FROM "measurement_unpartitioned"',
+    'DROP TABLE "measurement_unpartitioned"',
+]
+
+_maintenance: asyncio.Task | None = None
+
+
+def partition_start(time: datetime, interval: PartitionInterval) -> datetime:
+    time = time.astimezone(timezone.utc)
+    if interval == "week":
+        day = time.date() - timedelta(days=time.weekday())
+        return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return datetime(time.year, time.month, 1, tzinfo=timezone.utc)
+
+
+def next_partition(start: datetime, interval: PartitionInterval) -> datetime:
+    if interval == "week":
+        return start + timedelta(days=7)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(start: datetime, interval: PartitionInterval) -> str:
+    if interval == "week":
+        return f"measurement_w{start:%Y%m%d}"
+    return f"measurement_m{start:%Y%m}"
+
+
+def partition_statement(start: datetime, interval: PartitionInterval) -> str:
+    finish = next_partition(start, interval)
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(start, interval)}" '
+        f"PARTITION OF \"measurement\" FOR VALUES FROM ('{start.isoformat()}') "
+        f"TO ('{finish.isoformat()}')"
+    )
+
+
+def partition_bounds(name: str) -> tuple[datetime, datetime] | None:
+    for interval, prefix, date_format in (
+        ("month", "measurement_m", "%Y%m"),
+        ("week", "measurement_w", "%Y%m%d"),
+    ):
+        if name.startswith(prefix):
+            try:
+                start = datetime.strptime(name.removeprefix(prefix), date_format)
+            except ValueError:
+                return None
+            start = start.replace(tzinfo=timezone.utc)
+            return start, next_partition(start, interval)
+    return None
+
+
+def move_default_statement(start: datetime, interval: PartitionInterval) -> str:
+    name = partition_name(start, interval)
+    finish = next_partition(start, interval)
+    bounds = f"FROM ('{start.isoformat()}') TO ('{finish.isoformat()}')"
+    condition = (
+        f"\"time\" >= '{start.isoformat()}' AND \"time\" < '{finish.isoformat()}'"
+    )
+    return (
+        f'CREATE TABLE "{name}" (LIKE "measurement" INCLUDING DEFAULTS); '
+        f'INSERT INTO "{name}" SELECT * FROM "measurement_default" WHERE {condition}; '
+        f'DELETE FROM "measurement_default" WHERE {condition}; '
+        f'ALTER TABLE "measurement" ATTACH PARTITION "{name}" FOR VALUES {bounds}'
+    )
+
+
+async def create_partition(start: datetime, interval: PartitionInterval) -> None:
+    connection = get_connection()
+    finish = next_partition(start, interval)
+    rows = await connection.execute_query_dict(
+        f"SELECT to_regclass('{partition_name(start, interval)}') IS NOT NULL "
+        'AS present, EXISTS (SELECT 1 FROM "measurement_default" '
+        'WHERE "time" >= $1 AND "time" < $2) AS misplaced',
+        [start, finish],
+    )
+    if rows[0]["present"]:
+        return
+    if rows[0]["misplaced"]:
+        await connection.execute_script(move_default_statement(start, interval))
+        logger.info(
+            f"moved default partition rows to {partition_name(start, interval)}"
+        )
+    else:
+        await connection.execute_script(partition_statement(start, interval))
+
+
+async def is_partitioned() -> bool:
+    rows = await get_connection().execute_query_dict(
+        "SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = 'measurement'::regclass"
+    )
+    return bool(rows)
+
+
+async def create_partitions(
+    interval: PartitionInterval, first: datetime, ahead: int = PARTITIONS_AHEAD
+) -> None:
+    start = partition_start(first, interval)
+    last = partition_start(datetime.now(timezone.utc), interval)
+    for _ in range(ahead):
+        last = next_partition(last, interval)
+    while start <= last:
+        await create_partition(start, interval)
+        start = next_partition(start, interval)
+
+
+async def partition_measurements(interval: PartitionInterval) -> None:
+    if await is_partitioned():
+        await create_partitions(interval, datetime.now(timezone.utc))
+        return
+    async with in_transaction() as connection:
+        rows = await connection.execute_query_dict(
+            'SELECT MIN("time") AS first FROM "measurement"'
+        )
+        for statement in CONVERT_STATEMENTS:
+            await connection.execute_script(statement)
+        await create_partitions(
+            interval, rows[0]["first"] or datetime.now(timezone.utc)
+        )
+        for statement in COPY_STATEMENTS + MEASUREMENT_INDEXES:
+            await connection.execute_script(statement)
+        await connection.execute_script(MEASUREMENT_BRIN_INDEX)
+    logger.info(f"measurement table partitioned by {interval}")
+
+
+async def drop_expired_partitions(cutoff: datetime) -> list[str]:
+    connection = get_connection()
+    rows = await connection.execute_query_dict(
+        "SELECT c.relname AS name FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'measurement'::regclass"
+    )
+    dropped = []
+    for row in rows:
+        bounds = partition_bounds(row["name"])
+        if bounds and bounds[1] <= cutoff:
+            await connection.execute_script(f'DROP TABLE "{row["name"]}"')
+            dropped.append(row["name"])
+    return dropped
+
+
+async def maintain_partitions(interval: PartitionInterval) -> None:
+    while True:
+        await asyncio.sleep(PARTITIONS_CHECK_SECONDS)
+        try:
+            await create_partitions(interval, datetime.now(timezone.utc))
+        except Exception:
+            logger.exception("creating measurement partitions failed")
+
+
+async def setup_partitioning() -> None:
+    global _maintenance
+    if PARTITIONING not in ("month", "week"):
+        return
+    if get_connection().capabilities.dialect != "postgres":
+        logger.warning("measurement partitioning requires PostgreSQL")
+        return
+    await partition_measurements(PARTITIONING)
+    _maintenance = asyncio.create_task(maintain_partitions(PARTITIONING))
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from os import getenv
+from time import perf_counter
+from app.internal.aggregation import ROLLUP_RESOLUTIONS
+from app.internal.rollups import bucket_start
+from app.internal.sql import get_connection
+from app.models import LatestMeasurement, Measurement, MeasurementRollup, Sensor
+from app.startup import partitions
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPruner:
+    def __init__(
+        self,
+        default_days: int | None,
+        batch_size: int,
+        interval_seconds: float,
+        keep_rollups: bool,
+    ):
+        self.default_days = default_days
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.keep_rollups = keep_rollups
+        self.runs = 0
+        self.pruned_rows = 0
+        self.dropped_partitions = 0
+        self.last_run_ms = 0.0
+        self._task: asyncio.Task | None = None
+
+    @classmethod
+    def from_env(cls) -> "RetentionPruner":
+        return cls(
+            default_days=int(getenv("MEASUREMENT_RETENTION_DAYS") or 0) or None,
+            batch_size=int(getenv("RETENTION_BATCH_SIZE") or 5000),
+            interval_seconds=float(getenv("RETENTION_INTERVAL_SECONDS") or 3600),
+            keep_rollups=getenv("RETENTION_KEEP_ROLLUPS", "true").lower()
+            in ("1", "true"),
+        )
+
+    async def cutoffs(self, now: datetime) -> tuple[dict[str, datetime], int]:
+        policies = await Sensor.all().values_list(
+            "uuid", "retention_days", "device__retention_days"
+        )
+        cutoffs = {}
+        for sensor_id, sensor_days, device_days in policies:
+            if days := sensor_days or device_days or self.default_days:
+                cutoffs[str(sensor_id)] = now - timedelta(days=days)
+        return cutoffs, len(policies)
+
+    async def prune_sensor(self, sensor_id: str, cutoff: datetime) -> int:
+        expired = Measurement.filter(sensor_id=sensor_id, time__lt=cutoff)
+        pruned = 0
+        while True:
+            uuids = await expired.limit(self.batch_size).values_list("uuid", flat=True)
+            if uuids:
+                await expired.filter(uuid__in=uuids).delete()
+            pruned += len(uuids)
+            if len(uuids) < self.batch_size:
+                break
+            await asyncio.sleep(0)
+        await LatestMeasurement.filter(sensor_id=sensor_id, time__lt=cutoff).delete()
+        if not self.keep_rollups:
+            for resolution in ROLLUP_RESOLUTIONS:
+                await MeasurementRollup.filter(
+                    sensor_id=sensor_id,
+                    resolution=resolution,
+                    time__lt=bucket_start(cutoff, resolution),
+                ).delete()
+        return pruned
+
+    async def prune(self) -> int:
+        start = perf_counter()
+        cutoffs, sensors = await self.cutoffs(datetime.now(timezone.utc))
+        if (
+            cutoffs
+            and len(cutoffs) == sensors
+            and partitions.PARTITIONING
+            and get_connection().capabilities.dialect == "postgres"
+        ):
+            dropped = await partitions.drop_expired_partitions(min(cutoffs.values()))
+            self.dropped_partitions += len(dropped)
+        pruned = 0
+        for sensor_id, cutoff in cutoffs.items():
+            pruned += await self.prune_sensor(sensor_id, cutoff)
+        self.runs += 1
+        self.pruned_rows += pruned
+        self.last_run_ms = (perf_counter() - start) * 1000
+        return pruned
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.prune()
+            except Exception:
+                logger.exception("pruning expired measurements failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def metrics(self) -> dict:
+        return {
+            "runs": self.runs,
+            "pruned_rows": self.pruned_rows,
+            "dropped_partitions": self.dropped_partitions,
+            "last_run_ms": self.last_run_ms,
+        }
+
+
+retention_pruner = RetentionPruner.from_env()
@@ -0,0 +1,64 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from os import getenv
+from time import perf_counter
+from httpx import ASGITransport, AsyncClient
+from tortoise import Tortoise
+from app.main import app
+
+DB_URL = getenv("BENCH_DB_URL") or "sqlite://:memory:"
+
+USER_JSON = {
+    "username": "benchmark",
+    "password": "Pa$Sw0rd",
+    "email": "benchmark@xyz.com",
+}
+
+
+@asynccontextmanager
+async def benchmark_client():
+    await Tortoise.init(db_url=DB_URL, modules={"app": ["app.models"]})
+    await Tortoise.generate_schemas()
+    transport = ASGITransport(app=app)
+    try:
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+    finally:
+        await Tortoise._drop_databases()
+
+
+async def create_header(client: AsyncClient) -> dict[str, str]:
+    await client.post("/users/", json=USER_JSON)
+    auth_json = {key: USER_JSON[key] for key in ("username", "password")}
+    response = await client.post("/actions/token", data=auth_json)
+    data = response.json()
+    return {"Authorization": f"{data['token_type']} {data['access_token']}"}
+
+
+async def create_sensor(client: AsyncClient, header: dict, name: str = "bench") -> str:
+    device = await client.post("/devices/", headers=header, json={"name": name})
+    sensor = await client.post(
+        f"/sensors/{device.json()['uuid']}", headers=header, json={"name": name}
+    )
+    return sensor.json()["uuid"]
+
+
+def readings(count: int, start: datetime | None = None) -> list[dict]:
+    start = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {"time": (start + timedelta(seconds=i)).isoformat(), "value": float(i % 100)}
+        for i in range(count)
+    ]
+
+
+class Timer:
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = perf_counter() - self.start
+
+
+def report(name: str, rows: int, elapsed: float) -> None:
+    print(f"{name:<32} {rows:>9} rows {elapsed:>9.3f} s {rows / elapsed:>12.0f} rows/s")
@@ -0,0 +1,61 @@
+import asyncio
+from os import getenv
+from pydantic import TypeAdapter
+from benchmarks.common import (
+    Timer,
+    benchmark_client,
+    create_header,
+    create_sensor,
+    readings,
+    report,
+)
+from app.models import Device, Measurement, Sensor
+from app.pydantics.device import DeviceOutPydantic
+from app.pydantics.measurement import MeasurementOutPydantic
+from app.pydantics.sensor import SensorOutPydantic
+
+ROWS = int(getenv("BENCH_ROWS") or 20000)
+DEVICES = int(getenv("BENCH_DEVICES") or 200)
+BATCH_SIZE = 5000
+REPEAT = 5
+
+
+async def hydrated(model, pydantic_model) -> bytes:
+    rows = await model.all()
+    return TypeAdapter(list[pydantic_model]).dump_json(
+        [pydantic_model.model_validate(row) for row in rows]
+    )
+
+
+async def main():
+    async with benchmark_client() as client:
+        header = await create_header(client)
+        for number in range(DEVICES):
+            await create_sensor(client, header, f"list{number}")
+        sensor_uuid = await create_sensor(client, header, "series")
+        batch = readings(ROWS)
+        for start in range(0, ROWS, BATCH_SIZE):
+            await client.post(
+                f"/measurements/{sensor_uuid}/bulk",
+                headers=header,
+                json=batch[start : start + BATCH_SIZE],
+            )
+
+        endpoints = [
+            ("/devices/", Device, DeviceOutPydantic, DEVICES + 1),
+            ("/sensors/", Sensor, SensorOutPydantic, DEVICES + 1),
+            ("/measurements/", Measurement, MeasurementOutPydantic, ROWS),
+        ]
+        for url, model, pydantic_model, rows in endpoints:
+            with Timer() as timer:
+                for _ in range(REPEAT):
+                    await hydrated(model, pydantic_model)
+            report(f"{model.__name__} models", rows * REPEAT, timer.elapsed)
+            with Timer() as timer:
+                for _ in range(REPEAT):
+                    await client.get(url, headers=header)
+            report(f"GET {url}", rows * REPEAT, timer.elapsed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
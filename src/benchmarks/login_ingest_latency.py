@@ -0,0 +1,64 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from os import getenv
+from statistics import quantiles
+from time import perf_counter
+from benchmarks.common import (
+    USER_JSON,
+    benchmark_client,
+    create_header,
+    create_sensor,
+    readings,
+)
+from app.internal.passwords import password_pool
+
+LOGINS_PER_SECOND = float(getenv("BENCH_LOGINS_PER_SECOND") or 20)
+INGEST_REQUESTS = int(getenv("BENCH_ROWS") or 300)
+WORKERS = int(getenv("PASSWORD_HASH_WORKERS") or 2)
+
+
+def use_workers(workers: int) -> None:
+    password_pool.workers = workers
+    password_pool._executor = ThreadPoolExecutor(workers) if workers else None
+
+
+async def logins(client, stop: asyncio.Event) -> int:
+    auth_json = {key: USER_JSON[key] for key in ("username", "password")}
+    tasks = []
+    while not stop.is_set():
+        tasks.append(asyncio.create_task(client.post("/actions/token", data=auth_json)))
+        await asyncio.sleep(1 / LOGINS_PER_SECOND)
+    await asyncio.gather(*tasks)
+    return len(tasks)
+
+
+async def ingest(client, header, sensor_uuid) -> list[float]:
+    latencies = []
+    for reading in readings(INGEST_REQUESTS):
+        start = perf_counter()
+        await client.post(f"/measurements/{sensor_uuid}", headers=header, json=reading)
+        latencies.append((perf_counter() - start) * 1000)
+    return latencies
+
+
+async def main():
+    for workers in (0, WORKERS):
+        use_workers(workers)
+        async with benchmark_client() as client:
+            header = await create_header(client)
+            sensor_uuid = await create_sensor(client, header)
+            stop = asyncio.Event()
+            login_task = asyncio.create_task(logins(client, stop))
+            latencies = await ingest(client, header, sensor_uuid)
+            stop.set()
+            login_count = await login_task
+        percentiles = quantiles(latencies, n=100)
+        mode = f"{workers} hash workers" if workers else "hashing on event loop"
+        print(
+            f"{mode:<24} {login_count:>5} logins  ingest p50 {percentiles[49]:>8.2f} ms"
+            f"  p99 {percentiles[98]:>8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
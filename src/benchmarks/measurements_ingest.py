@@ -0,0 +1,42 @@
+import asyncio
+from os import getenv
+from benchmarks.common import (
+    Timer,
+    benchmark_client,
+    create_header,
+    create_sensor,
+    readings,
+    report,
+)
+
+ROWS = int(getenv("BENCH_ROWS") or 2000)
+BATCH_SIZE = int(getenv("BENCH_BATCH_SIZE") or 500)
+
+
+async def main():
+    async with benchmark_client() as client:
+        header = await create_header(client)
+
+        sensor_uuid = await create_sensor(client, header, "single")
+        with Timer() as timer:
+            for reading in readings(ROWS):
+                await client.post(
+                    f"/measurements/{sensor_uuid}", headers=header, json=reading
+                )
+        report("POST /measurements/{sensor}", ROWS, timer.elapsed)
+
+        for batch_size in (BATCH_SIZE, ROWS):
+            sensor_uuid = await create_sensor(client, header, f"bulk{batch_size}")
+            batch = readings(ROWS)
+            with Timer() as timer:
+                for start in range(0, ROWS, batch_size):
+                    await client.post(
+                        f"/measurements/{sensor_uuid}/bulk",
+                        headers=header,
+                        json=batch[start : start + batch_size],
+                    )
+            report(f"POST .../bulk (batch {batch_size})", ROWS, timer.elapsed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
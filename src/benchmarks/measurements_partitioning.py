@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from os import getenv
+from tortoise import Tortoise
+from benchmarks.common import DB_URL, Timer
+from app.internal.sql import get_connection
+from app.startup.partitions import next_partition, partition_start
+
+ROWS = int(getenv("BENCH_ROWS") or 1000000)
+SENSORS = int(getenv("BENCH_SENSORS") or 100)
+INTERVAL = getenv("BENCH_PARTITIONING") or "month"
+DAYS = int(getenv("BENCH_DAYS") or 730)
+REPEAT = 20
+START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+TABLE = (
+    'CREATE TABLE "{name}" ("uuid" UUID NOT NULL DEFAULT gen_random_uuid(), '
+    '"time" TIMESTAMPTZ NOT NULL, "value" DOUBLE PRECISION NOT NULL, '
+    '"sensor_id" INT NOT NULL, {key}) {partitioning}'
+)
+
+FILL = (
+    'INSERT INTO "{name}" ("time", "value", "sensor_id") '
+    "SELECT TIMESTAMPTZ '{start}' + (n * {step}) * INTERVAL '1 second', "
+    "random() * 100, n % {sensors} FROM generate_series(0, {rows} - 1) AS n"
+)
+
+
+async def create_tables() -> None:
+    connection = get_connection()
+    step = DAYS * 86400 / ROWS
+    for name, key, partitioning in (
+        ("bench_plain", 'PRIMARY KEY ("uuid")', ""),
+        (
+            "bench_partitioned",
+            'PRIMARY KEY ("uuid", "time")',
+            'PARTITION BY RANGE ("time")',
+        ),
+    ):
+        await connection.execute_script(f'DROP TABLE IF EXISTS "{name}"')
+        await connection.execute_script(
+            TABLE.format(name=name, key=key, partitioning=partitioning)
+        )
+        if partitioning:
+            start = partition_start(START, INTERVAL)
+            while start <= START + timedelta(days=DAYS):
+                finish = next_partition(start, INTERVAL)
+                await connection.execute_script(
+                    f'CREATE TABLE "{name}_{start:%Y%m%d}" PARTITION OF "{name}" '
+                    f"FOR VALUES FROM ('{start.isoformat()}') "
+                    f"TO ('{finish.isoformat()}')"
+                )
+                start = finish
+        with Timer() as timer:
+            await connection.execute_script(
+                FILL.format(
+                    name=name,
+                    start=START.isoformat(),
+                    step=step,
+                    sensors=SENSORS,
+                    rows=ROWS,
+                )
+            )
+            await connection.execute_script(
+                f'ALTER TABLE "{name}" ADD UNIQUE ("time", "sensor_id")'
+            )
+            await connection.execute_script(
+                f'CREATE INDEX ON "{name}" ("sensor_id", "time")'
+            )
+            await connection.execute_script(f'ANALYZE "{name}"')
+        print(f"{name:<20} loaded {ROWS} rows in {timer.elapsed:.1f} s")
+
+
+async def range_queries(name: str) -> None:
+    connection = get_connection()
+    middle = START + timedelta(days=DAYS // 2)
+    queries = {
+        "sensor + 1 day": (
+            f'SELECT * FROM "{name}" WHERE "sensor_id" = 1 '
+            'AND "time" >= $1 AND "time" < $2 ORDER BY "time"',
+            [middle, middle + timedelta(days=1)],
+        ),
+        "all sensors + 1 hour": (
+            f'SELECT * FROM "{name}" WHERE "time" >= $1 AND "time" < $2 '
+            'ORDER BY "time"',
+            [middle, middle + timedelta(hours=1)],
+        ),
+        "sensor latest 100": (
+            f'SELECT * FROM "{name}" WHERE "sensor_id" = 1 '
+            'ORDER BY "time" DESC LIMIT 100',
+            [],
+        ),
+    }
+    for query_name, (sql, values) in queries.items():
+        with Timer() as timer:
+            for _ in range(REPEAT):
+                await connection.execute_query(sql, values)
+        print(f"{name:<20} {query_name:<24} {timer.elapsed / REPEAT * 1000:>9.3f} ms")
+        plan = await connection.execute_query_dict(f"EXPLAIN {sql}", values)
+        scanned = sum(f" on {name}_" in row["QUERY PLAN"] for row in plan)
+        if scanned:
+            print(f"{'':<20} {'':<24} {scanned} partitions scanned")
+
+
+async def main():
+    if not DB_URL.startswith("postgres"):
+        print("set BENCH_DB_URL to a PostgreSQL database to compare partitioning")
+        return
+    await Tortoise.init(db_url=DB_URL, modules={"app": ["app.models"]})
+    try:
+        await create_tables()
+        for name in ("bench_plain", "bench_partitioned"):
+            await range_queries(name)
+        for name in ("bench_plain", "bench_partitioned"):
+            await get_connection().execute_script(f'DROP TABLE "{name}"')
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
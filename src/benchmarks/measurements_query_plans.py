@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timezone
+from os import getenv
+from benchmarks.common import (
+    Timer,
+    benchmark_client,
+    create_header,
+    create_sensor,
+    readings,
+)
+from app.internal.sql import get_connection
+from app.models import Measurement, User
+from app.startup.migrations import MIGRATIONS, migrate
+
+ROWS = int(getenv("BENCH_ROWS") or 50000)
+SENSORS = int(getenv("BENCH_SENSORS") or 10)
+BATCH_SIZE = 5000
+REPEAT = 20
+
+
+def hot_queries(user_id: str, sensor_uuid: str) -> dict:
+    start = datetime(2024, 1, 1, 1, tzinfo=timezone.utc)
+    finish = datetime(2024, 1, 1, 2, tzinfo=timezone.utc)
+    return {
+        "sensor + time range": Measurement.filter(
+            sensor_id=sensor_uuid, time__gte=start, time__lte=finish
+        ),
+        "user + time range": Measurement.filter(
+            user_id=user_id, time__gte=start, time__lte=finish
+        ),
+        "value range": Measurement.filter(value__gte=98, value__lte=99),
+    }
+
+
+async def explain(sql: str) -> list[str]:
+    connection = get_connection()
+    if connection.capabilities.dialect == "postgres":
+        rows = await connection.execute_query_dict(f"EXPLAIN ANALYZE {sql}")
+        return [row["QUERY PLAN"] for row in rows]
+    rows = await connection.execute_query_dict(f"EXPLAIN QUERY PLAN {sql}")
+    return [row["detail"] for row in rows]
+
+
+async def show_plans(title: str, queries: dict) -> None:
+    print(f"--- {title}")
+    for name, queryset in queries.items():
+        with Timer() as timer:
+            for _ in range(REPEAT):
+                await queryset.count()
+        print(f"{name:<24} {timer.elapsed / REPEAT * 1000:>9.3f} ms/query")
+        for line in await explain(queryset.sql(params_inline=True)):
+            print(f"    {line}")
+
+
+async def drop_indexes() -> None:
+    connection = get_connection()
+    for _, _, statements, postgres_statements in MIGRATIONS:
+        for statement in statements + postgres_statements:
+            name = statement.split('"')[1]
+            await connection.execute_script(f'DROP INDEX IF EXISTS "{name}"')
+    await connection.execute_script("DROP TABLE IF EXISTS schema_version")
+
+
+async def main():
+    async with benchmark_client() as client:
+        header = await create_header(client)
+        sensor_uuids = [
+            await create_sensor(client, header, f"plan{number}")
+            for number in range(SENSORS)
+        ]
+        batch = readings(ROWS // SENSORS)
+        for sensor_uuid in sensor_uuids:
+            for start in range(0, len(batch), BATCH_SIZE):
+                await client.post(
+                    f"/measurements/{sensor_uuid}/bulk",
+                    headers=header,
+                    json=batch[start : start + BATCH_SIZE],
+                )
+        user = await User.get(username="benchmark")
+        queries = hot_queries(str(user.uuid), sensor_uuids[0])
+
+        await drop_indexes()
+        await show_plans("before", queries)
+        await migrate()
+        await get_connection().execute_script("ANALYZE")
+        await show_plans("after", queries)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
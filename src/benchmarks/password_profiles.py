@@ -0,0 +1,38 @@
+from os import getenv
+from statistics import quantiles
+from time import perf_counter
+from argon2 import PasswordHasher
+from benchmarks.common import USER_JSON
+from app.internal.passwords import PROFILES, hash_parameters
+
+REPEAT = int(getenv("BENCH_REPEAT") or 50)
+
+
+def latencies(function, *args) -> list[float]:
+    results = []
+    for _ in range(REPEAT):
+        start = perf_counter()
+        function(*args)
+        results.append((perf_counter() - start) * 1000)
+    return results
+
+
+def main():
+    profiles = {**PROFILES, "configured": hash_parameters()}
+    for name, parameters in profiles.items():
+        hasher = PasswordHasher.from_parameters(parameters)
+        hashed = hasher.hash(USER_JSON["password"])
+        for operation, timings in (
+            ("hash", latencies(hasher.hash, USER_JSON["password"])),
+            ("verify", latencies(hasher.verify, hashed, USER_JSON["password"])),
+        ):
+            percentiles = quantiles(timings, n=100)
+            print(
+                f"{name:<22} {operation:<7} t={parameters.time_cost} "
+                f"m={parameters.memory_cost:>8} KiB p={parameters.parallelism}  "
+                f"p50 {percentiles[49]:>8.2f} ms  p99 {percentiles[98]:>8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
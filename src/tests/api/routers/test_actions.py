@@ -1,4 +1,11 @@
 import pytest
+from dataclasses import replace
+from time import time
+from argon2 import PasswordHasher
+from jose import JWTError
+from app.internal.authentication import Token, TokenCache
+from app.internal.passwords import PROFILES, PasswordHasherPool, password_pool
+from app.models import User
 
 
 @pytest.mark.anyio
@@ -22,3 +29,81 @@ class TestActions:
         header_type = {"Content-Type": "application/x-www-form-urlencoded"}
         post = client.post("/actions/token/", data=auth_json, headers=header_type)
         assert post.status_code == status
+
+    async def test_metrics(self, client, header):
+        get = client.get("/actions/metrics", headers=header)
+        assert get.status_code == 200
+        assert get.json()["write_buffer"]["queue_depth"] == 0
+        assert get.json()["retention"]["runs"] == 0
+        assert get.json()["tokens"]["size"] >= 1
+
+    async def test_auth_busy(self, client, user, user_json, monkeypatch):
+        # Fill the password hashing queue
+        pending = password_pool.workers + password_pool.queue_size
+        monkeypatch.setattr(password_pool, "pending", pending)
+
+        # Test request
+        auth_json = {key: user_json[key] for key in ("username", "password")}
+        post = client.post("/actions/token/", data=auth_json)
+        assert post.status_code == 503
+        assert post.headers["Retry-After"] == "1"
+
+    async def test_password_pool(self):
+        pool = PasswordHasherPool(
+            workers=1, queue_size=0, parameters=PROFILES["minimal"]
+        )
+        hashed = await pool.hash("Pa$Sw0rd")
+        assert await pool.verify(hashed, "Pa$Sw0rd")
+        assert not pool.needs_rehash(hashed)
+        assert pool.metrics() == {
+            "workers": 1,
+            "pending": 0,
+            "rejected": 0,
+            "rehashed": 0,
+        }
+
+    async def test_auth_rehash(self, client, user, user_json, monkeypatch):
+        # Raise the hashing cost after the user was created
+        stronger = replace(PROFILES["minimal"], time_cost=2)
+        monkeypatch.setattr(
+            password_pool, "hasher", PasswordHasher.from_parameters(stronger)
+        )
+        previous = (await User.get(username=user_json["username"])).password
+        assert password_pool.needs_rehash(previous)
+
+        # Test request
+        auth_json = {key: user_json[key] for key in ("username", "password")}
+        post = client.post("/actions/token/", data=auth_json)
+        assert post.status_code == 200
+
+        # Check stored hash was upgraded
+        upgraded = (await User.get(username=user_json["username"])).password
+        assert upgraded != previous
+        assert not password_pool.needs_rehash(upgraded)
+        post = client.post("/actions/token/", data=auth_json)
+        assert post.status_code == 200
+
+    async def test_token_cache(self):
+        cache = TokenCache(max_size=2, ttl_seconds=60)
+        tokens = [Token.encode_token({"uuid": str(number)}) for number in range(3)]
+
+        # Check repeated tokens are served from cache
+        assert cache.decode(tokens[0]) == {"uuid": "0"}
+        assert cache.decode(tokens[0]) == {"uuid": "0"}
+        assert cache.metrics() == {"size": 1, "hits": 1, "misses": 1}
+
+        # Check least recently used token is evicted
+        cache.decode(tokens[1])
+        cache.decode(tokens[0])
+        cache.decode(tokens[2])
+        cache.decode(tokens[0])
+        cache.decode(tokens[1])
+        assert cache.metrics() == {"size": 2, "hits": 3, "misses": 4}
+
+        # Check tokens are cached no longer than their expiration
+        expiration = int(time()) + 30
+        cache.decode(Token.encode_token({"uuid": "3", "exp": expiration}))
+        assert next(reversed(cache._tokens.values()))[0] == expiration
+        with pytest.raises(JWTError):
+            cache.decode(Token.encode_token({"uuid": "4", "exp": int(time()) - 1}))
+        assert cache.metrics() == {"size": 2, "hits": 3, "misses": 6}
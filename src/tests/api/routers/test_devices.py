@@ -1,4 +1,6 @@
+import asyncio
 import pytest
+from app.internal.device_keys import DeviceKeyIndex
 from app.models import Device
 
 
@@ -286,3 +288,157 @@ class TestDevice:
         get = client.get(f"/devices/", headers=header2)
         assert get.status_code == 200
         assert get.json() == []
+
+    async def test_get_fields(self, client, header, device, device_json):
+        get = client.get("/devices/?fields=name,is_shared", headers=header)
+        assert get.status_code == 200
+        assert get.json() == [device_json]
+
+    async def test_get_invalid_fields(self, client, header, device):
+        get = client.get("/devices/?fields=name,user_id", headers=header)
+        assert get.status_code == 422
+
+    async def test_get_shared_queries(self, client, header, header2, queries):
+        # Preparations
+        device_json = {
+            "name": "test_device",
+            "is_shared": True,
+        }
+        create = client.post("/devices/", headers=header, json=device_json)
+
+        # Get own and shared in one query each
+        for user_header in (header, header2):
+            queries.count = 0
+            get = client.get(
+                f"/devices/?uuid={create.json()["uuid"]}", headers=user_header
+            )
+            assert get.json() == [create.json()]
+            assert queries.count == 1
+
+    async def test_get_tree(
+        self, client, header, device_shared, sensor_shared, sensor_shared2, queries
+    ):
+        # Preparations
+        readings = [
+            {"time": f"2024-07-30T14:4{minute}:00Z", "value": float(minute)}
+            for minute in range(3)
+        ]
+        for sensor in (sensor_shared, sensor_shared2):
+            client.post(
+                f"/measurements/{sensor["uuid"]}/bulk", headers=header, json=readings
+            )
+
+        # Get tree
+        queries.count = 0
+        get = client.get(
+            f"/devices/{device_shared["uuid"]}/tree?readings=2", headers=header
+        )
+        assert get.status_code == 200
+        assert queries.count == 3
+
+        # Check response
+        tree = get.json()
+        assert tree["uuid"] == device_shared["uuid"]
+        assert [sensor["uuid"] for sensor in tree["sensors"]] == [
+            sensor_shared["uuid"],
+            sensor_shared2["uuid"],
+        ]
+        for sensor in tree["sensors"]:
+            values = [reading["value"] for reading in sensor["measurements"]]
+            assert values == [2.0, 1.0]
+
+    async def test_get_tree_shared(
+        self, client, header2, device_shared, sensor_shared, measurement_shared
+    ):
+        get = client.get(f"/devices/{device_shared["uuid"]}/tree", headers=header2)
+        assert get.status_code == 200
+        assert get.json()["sensors"][0]["measurements"] == [measurement_shared]
+
+    async def test_get_tree_not_shared(self, client, header2, device):
+        get = client.get(f"/devices/{device["uuid"]}/tree", headers=header2)
+        assert get.status_code == 404
+
+    async def test_keys(
+        self, client, header, header2, device, sensor, sensor_json, measurement_json
+    ):
+        # Create key
+        post = client.post(
+            f"/devices/{device["uuid"]}/keys", headers=header, json={"name": "esp32"}
+        )
+        assert post.status_code == 200
+        assert post.json()["name"] == "esp32"
+        key_header = {"X-Device-Key": post.json()["key"]}
+
+        # Try to create key for another user's device
+        post2 = client.post(f"/devices/{device["uuid"]}/keys", headers=header2, json={})
+        assert post2.status_code == 404
+
+        # Ingest with key
+        create = client.post(
+            f"/measurements/{sensor["uuid"]}", headers=key_header, json=measurement_json
+        )
+        assert create.status_code == 200
+        bulk = client.post(
+            f"/measurements/{sensor["uuid"]}/bulk",
+            headers=key_header,
+            json=[{**measurement_json, "time": "2024-07-30T14:49:00Z"}],
+        )
+        assert bulk.json()["created"] == 1
+
+        # Try to ingest into another device's sensor
+        other_device = client.post(
+            "/devices/", headers=header, json={"name": "other_device"}
+        )
+        other_sensor = client.post(
+            f"/sensors/{other_device.json()["uuid"]}", headers=header, json=sensor_json
+        )
+        create = client.post(
+            f"/measurements/{other_sensor.json()["uuid"]}",
+            headers=key_header,
+            json=measurement_json,
+        )
+        assert create.status_code == 404
+
+        # Try to use key outside of ingest
+        get = client.get("/measurements/", headers=key_header)
+        assert get.status_code == 401
+
+        # Try to ingest with wrong key
+        wrong_header = {"X-Device-Key": key_header["X-Device-Key"][:-1] + "x"}
+        create = client.post(
+            f"/measurements/{sensor["uuid"]}",
+            headers=wrong_header,
+            json=measurement_json,
+        )
+        assert create.status_code == 401
+
+        # List keys without secrets
+        get = client.get(f"/devices/{device["uuid"]}/keys", headers=header)
+        assert [key["uuid"] for key in get.json()] == [post.json()["uuid"]]
+        assert "key" not in get.json()[0] and "digest" not in get.json()[0]
+
+        # Revoke key
+        delete = client.delete(
+            f"/devices/{device["uuid"]}/keys/{post.json()["uuid"]}", headers=header
+        )
+        assert delete.status_code == 200
+        assert delete.json()["revoked_at"]
+        create = client.post(
+            f"/measurements/{sensor["uuid"]}/bulk",
+            headers=key_header,
+            json=[measurement_json],
+        )
+        assert create.status_code == 401
+
+    async def test_keys_refresh(self, queries):
+        # Verify concurrently with a stale index
+        index = DeviceKeyIndex(secret="secret", refresh_seconds=30)
+        queries.count = 0
+        results = await asyncio.gather(
+            *(index.verify(f"key{number}.secret") for number in range(10))
+        )
+
+        # Check the index was loaded once
+        assert results == [None] * 10
+        assert queries.count == 1
+        assert index.metrics()["refreshes"] == 1
@@ -1,5 +1,10 @@
+import asyncio
+import struct
+import json
 import pytest
-from app.models import Measurement
+from tortoise.exceptions import IntegrityError
+from app.internal.write_buffer import WriteBuffer, write_buffer
+from app.models import Measurement, MeasurementRollup
 
 
 @pytest.mark.anyio
@@ -374,3 +379,802 @@ class TestMeasurement:
         get = client.get(f"/measurements/", headers=header2)
         assert get.status_code == 200
         assert get.json() == []
+
+    async def test_create_bulk(self, client, header, sensor):
+        # Preparations
+        measurements_json = [
+            {
+                "time": "2024-07-30T14:48:00Z",
+                "value": 5.0,
+            },
+            {
+                "time": "1998-12-31T23:59:59.999000Z",
+                "value": 10.0,
+            },
+        ]
+
+        # Create
+        create = client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=measurements_json,
+        )
+        assert create.status_code == 200
+
+        # Check response
+        response = create.json()
+        assert response["created"] == 2
+        assert response["conflicts"] == 0
+        for status, measurement_json in zip(
+            response["measurements"], measurements_json
+        ):
+            assert status["uuid"]
+            assert status["status"] == "created"
+            assert status["time"] == measurement_json["time"]
+            assert status["value"] == measurement_json["value"]
+
+        # Check records
+        assert await Measurement.filter(sensor_id=sensor["uuid"]).count() == 2
+
+    async def test_create_bulk_conflicts(
+        self, client, header, sensor, measurement, measurement_json, measurement2_json
+    ):
+        # Create with stored and repeated readings
+        create = client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=[measurement_json, measurement2_json, measurement2_json],
+        )
+        assert create.status_code == 200
+
+        # Check response
+        response = create.json()
+        assert response["created"] == 1
+        assert response["conflicts"] == 2
+        statuses = [status["status"] for status in response["measurements"]]
+        assert statuses == ["conflict", "created", "conflict"]
+        assert response["measurements"][0]["uuid"] is None
+
+        # Check records
+        assert await Measurement.filter(sensor_id=sensor["uuid"]).count() == 2
+
+    async def test_create_bulk_not_owned(
+        self, client, header2, sensor, measurement_json
+    ):
+        create = client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header2,
+            json=[measurement_json],
+        )
+        assert create.status_code == 404
+        assert await Measurement.filter(sensor_id=sensor["uuid"]).count() == 0
+
+    @pytest.mark.parametrize("on_conflict", ["skip", "update"])
+    async def test_create_not_owned(
+        self, client, header2, sensor, measurement, measurement_json, on_conflict
+    ):
+        create = client.post(
+            f"/measurements/{sensor['uuid']}?on_conflict={on_conflict}",
+            headers=header2,
+            json={**measurement_json, "value": 666.0},
+        )
+        assert create.status_code == 404
+        stored = await Measurement.get(uuid=measurement["uuid"])
+        assert stored.value == measurement_json["value"]
+
+    async def test_create_bulk_uppercase_uuid(
+        self, client, header, sensor, measurement_json
+    ):
+        create = client.post(
+            f"/measurements/{sensor['uuid'].upper()}/bulk",
+            headers=header,
+            json=[measurement_json],
+        )
+        assert create.status_code == 200
+        assert create.json()["created"] == 1
+        assert await Measurement.filter(sensor_id=sensor["uuid"]).count() == 1
+
+    async def test_create_batch(
+        self,
+        client,
+        header,
+        sensor_shared,
+        sensor_shared2,
+        measurement_json,
+        measurement2_json,
+    ):
+        # Create
+        batch_json = {
+            sensor_shared["uuid"]: [measurement_json, measurement2_json],
+            sensor_shared2["uuid"]: [measurement_json],
+        }
+        create = client.post("/measurements/batch", headers=header, json=batch_json)
+        assert create.status_code == 200
+
+        # Check response
+        response = create.json()
+        assert response["created"] == 3
+        assert response["conflicts"] == 0
+
+        # Check records
+        for sensor_uuid, measurements_json in batch_json.items():
+            count = await Measurement.filter(sensor_id=sensor_uuid).count()
+            assert count == len(measurements_json)
+
+    async def test_create_batch_not_owned(
+        self, client, header, header2, sensor, measurement_json
+    ):
+        # Preparations
+        device = client.post("/devices/", headers=header2, json={"name": "device2"})
+        sensor2 = client.post(
+            f"/sensors/{device.json()['uuid']}", headers=header2, json={"name": "s2"}
+        )
+
+        # Try to create
+        batch_json = {
+            sensor["uuid"]: [measurement_json],
+            sensor2.json()["uuid"]: [measurement_json],
+        }
+        create = client.post("/measurements/batch", headers=header2, json=batch_json)
+        assert create.status_code == 404
+
+        # Check records
+        assert await Measurement.all().count() == 0
+
+    @pytest.mark.parametrize(
+        "content_type, body, error_line",
+        [
+            (
+                "application/x-ndjson",
+                '{"time": "2024-07-30T14:48:00Z", "value": 5.0}\n'
+                '{"time": "2023-01-19T12:58:03Z", "value": 10.0}\n'
+                '{"time": "not a time", "value": 1.0}\n'
+                "\n"
+                '{"time": "2024-07-30T14:48:00Z", "value": 7.0}',
+                3,
+            ),
+            (
+                "text/csv",
+                "time,value\n"
+                "2024-07-30T14:48:00Z,5.0\n"
+                "2023-01-19T12:58:03Z,10.0\n"
+                "not a time,1.0\n"
+                "2024-07-30T14:48:00Z,7.0\n",
+                4,
+            ),
+        ],
+    )
+    async def test_create_stream(
+        self, client, monkeypatch, header, sensor, content_type, body, error_line
+    ):
+        # Flush every two readings
+        monkeypatch.setattr("app.internal.ingest.STREAM_CHUNK_SIZE", 2)
+
+        # Create
+        create = client.post(
+            f"/measurements/{sensor['uuid']}/stream",
+            headers={**header, "Content-Type": content_type},
+            content=body,
+        )
+        assert create.status_code == 200
+
+        # Check response
+        response = create.json()
+        assert response["accepted"] == 2
+        assert response["conflicts"] == 1
+        assert response["rejected"] == 1
+        assert response["errors"][0]["line"] == error_line
+
+        # Check records
+        assert await Measurement.filter(sensor_id=sensor["uuid"]).count() == 2
+
+    @pytest.mark.parametrize(
+        "on_conflict, status, value",
+        [
+            ("skip", "conflict", 5.0),
+            ("update", "updated", 1.0),
+        ],
+    )
+    async def test_create_bulk_on_conflict(
+        self,
+        client,
+        header,
+        sensor,
+        measurement,
+        measurement_json,
+        measurement2_json,
+        on_conflict,
+        status,
+        value,
+    ):
+        # Create again with changed value
+        edited_json = {**measurement_json, "value": 1.0}
+        create = client.post(
+            f"/measurements/{sensor['uuid']}/bulk?on_conflict={on_conflict}",
+            headers=header,
+            json=[edited_json, measurement2_json],
+        )
+        assert create.status_code == 200
+
+        # Check response
+        response = create.json()
+        assert response["created"] == 1
+        assert response["updated"] == (on_conflict == "update")
+        assert response["conflicts"] == (on_conflict == "skip")
+        assert response["measurements"][0]["status"] == status
+
+        # Check record
+        record = await Measurement.get(uuid=measurement["uuid"])
+        assert record.value == value
+
+    async def test_create_bulk_on_conflict_error(
+        self, client, header, sensor, measurement, measurement_json, measurement2_json
+    ):
+        # Try to create
+        create = client.post(
+            f"/measurements/{sensor['uuid']}/bulk?on_conflict=error",
+            headers=header,
+            json=[measurement2_json, measurement_json],
+        )
+        assert create.status_code == 422
+
+        # Check records
+        assert await Measurement.filter(sensor_id=sensor["uuid"]).count() == 1
+
+    @pytest.mark.parametrize(
+        "on_conflict, status, value",
+        [
+            ("error", 422, 5.0),
+            ("skip", 200, 5.0),
+            ("update", 200, 1.0),
+        ],
+    )
+    async def test_create_again(
+        self,
+        client,
+        header,
+        sensor,
+        measurement,
+        measurement_json,
+        on_conflict,
+        status,
+        value,
+    ):
+        # Create again with changed value
+        create = client.post(
+            f"/measurements/{sensor['uuid']}?on_conflict={on_conflict}",
+            headers=header,
+            json={**measurement_json, "value": 1.0},
+        )
+        assert create.status_code == status
+
+        # Check response
+        if status == 200:
+            assert create.json() == {**measurement, "value": value}
+
+        # Check record
+        record = await Measurement.get(uuid=measurement["uuid"])
+        assert record.value == value
+        assert await Measurement.filter(sensor_id=sensor["uuid"]).count() == 1
+
+    async def test_create_buffered(
+        self, client, monkeypatch, header, sensor, measurement_json
+    ):
+        # Enable buffer
+        monkeypatch.setattr(write_buffer, "enabled", True)
+        flushes = write_buffer.flushes
+
+        # Create
+        create = client.post(
+            f"/measurements/{sensor['uuid']}", headers=header, json=measurement_json
+        )
+        assert create.status_code == 200
+        assert write_buffer.flushes == flushes + 1
+
+        # Check record
+        record = await Measurement.get(uuid=create.json()["uuid"])
+        assert record.value == measurement_json["value"]
+
+    async def test_write_buffer_group_commit(self, user, sensor):
+        # Preparations
+        buffer = WriteBuffer(enabled=True, max_rows=3, max_latency_ms=1000)
+        times = ["2024-07-30T14:48:00Z", "2023-01-19T12:58:03Z", "2024-07-30T14:48:00Z"]
+        measurements = [
+            Measurement(
+                time=time, value=1.0, sensor_id=sensor["uuid"], user_id=user["uuid"]
+            )
+            for time in times
+        ]
+
+        # Submit concurrently
+        results = await asyncio.gather(
+            *(buffer.submit(measurement) for measurement in measurements),
+            return_exceptions=True,
+        )
+
+        # Check results
+        assert results[:2] == measurements[:2]
+        assert isinstance(results[2], IntegrityError)
+        assert buffer.metrics()["flushes"] == 1
+        assert buffer.metrics()["flushed_rows"] == 3
+        assert await Measurement.filter(sensor_id=sensor["uuid"]).count() == 2
+
+    async def test_get_paginated(self, client, header, sensor):
+        # Preparations
+        measurements_json = [
+            {
+                "time": "2024-07-30T14:48:00Z",
+                "value": 5.0,
+            },
+            {
+                "time": "1998-12-31T23:59:59.999000Z",
+                "value": 10.0,
+            },
+            {
+                "time": "1999-01-01T00:00:00Z",
+                "value": -15.0,
+            },
+        ]
+        client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=measurements_json,
+        )
+
+        # Get first page
+        first_page = client.get("/measurements/?limit=2", headers=header)
+        assert first_page.status_code == 200
+        assert len(first_page.json()) == 2
+        cursor = first_page.headers["X-Next-Cursor"]
+
+        # Get last page
+        last_page = client.get(
+            f"/measurements/?limit=2&cursor={cursor}", headers=header
+        )
+        assert last_page.status_code == 200
+        assert len(last_page.json()) == 1
+        assert "X-Next-Cursor" not in last_page.headers
+
+        # Check order
+        times = [row["time"] for row in first_page.json() + last_page.json()]
+        assert times == sorted(row["time"] for row in measurements_json)
+
+    async def test_get_invalid_cursor(self, client, header, measurement):
+        get = client.get("/measurements/?limit=2&cursor=xD", headers=header)
+        assert get.status_code == 422
+        assert "cursor" in str(get.json())
+
+    @pytest.mark.parametrize(
+        "export_format, content_type",
+        [
+            ("ndjson", "application/x-ndjson"),
+            ("csv", "text/csv"),
+        ],
+    )
+    async def test_export(
+        self, client, monkeypatch, header, sensor, export_format, content_type
+    ):
+        # Preparations
+        monkeypatch.setattr("app.internal.export.EXPORT_CHUNK_SIZE", 2)
+        measurements_json = [
+            {
+                "time": "1998-12-31T23:59:59.999000Z",
+                "value": 10.0,
+            },
+            {
+                "time": "1999-01-01T00:00:00Z",
+                "value": -15.0,
+            },
+            {
+                "time": "2024-07-30T14:48:00Z",
+                "value": 5.0,
+            },
+        ]
+        client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=measurements_json,
+        )
+
+        # Export
+        export = client.get(
+            f"/measurements/export?format={export_format}&sensor_uuid={sensor['uuid']}",
+            headers=header,
+        )
+        assert export.status_code == 200
+        assert export.headers["content-type"].startswith(content_type)
+
+        # Check rows
+        lines = export.text.splitlines()
+        if export_format == "csv":
+            assert lines.pop(0) == "uuid,time,value"
+            rows = [
+                dict(zip(("uuid", "time", "value"), line.split(","))) for line in lines
+            ]
+            rows = [{**row, "value": float(row["value"])} for row in rows]
+        else:
+            rows = [json.loads(line) for line in lines]
+        get = client.get("/measurements/", headers=header)
+        assert rows == get.json()
+        assert [row["time"] for row in rows] == [m["time"] for m in measurements_json]
+
+    async def test_export_shared(
+        self, client, header2, sensor_shared, measurement_shared, measurement_shared2
+    ):
+        export = client.get(
+            f"/measurements/export?sensor_uuid={sensor_shared['uuid']}", headers=header2
+        )
+        assert export.status_code == 200
+        assert len(export.text.splitlines()) == 2
+
+    async def test_export_not_shared(self, client, header2, sensor, measurement):
+        export = client.get(
+            f"/measurements/export?sensor_uuid={sensor['uuid']}", headers=header2
+        )
+        assert export.status_code == 200
+        assert export.text == ""
+
+    @pytest.mark.parametrize(
+        "query, buckets",
+        [
+            (
+                "bucket=1h",
+                [
+                    ("2024-07-30T14:00:00Z", 1.0, 3.0, 2.0, 4.0, 2),
+                    ("2024-07-30T15:00:00Z", -4.0, -4.0, -4.0, -4.0, 1),
+                ],
+            ),
+            (
+                "bucket=1d",
+                [("2024-07-30T00:00:00Z", -4.0, 3.0, 0.0, 0.0, 3)],
+            ),
+            (
+                "bucket=30m&start_time=2024-07-30T14:30:00Z"
+                "&finish_time=2024-07-30T15:10:00Z",
+                [("2024-07-30T14:30:00Z", 3.0, 3.0, 3.0, 3.0, 1)],
+            ),
+        ],
+    )
+    async def test_aggregate(self, client, header, sensor, query, buckets):
+        # Preparations
+        measurements_json = [
+            {"time": "2024-07-30T14:10:00Z", "value": 1.0},
+            {"time": "2024-07-30T14:50:00Z", "value": 3.0},
+            {"time": "2024-07-30T15:10:00Z", "value": -4.0},
+        ]
+        client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=measurements_json,
+        )
+
+        # Aggregate
+        get = client.get(
+            f"/measurements/aggregate?sensor_uuid={sensor['uuid']}&{query}",
+            headers=header,
+        )
+        assert get.status_code == 200
+
+        # Check buckets
+        keys = ("time", "min", "max", "avg", "sum", "count")
+        assert get.json() == [dict(zip(keys, bucket)) for bucket in buckets]
+
+    async def test_aggregate_shared(
+        self, client, header2, sensor_shared, measurement_shared
+    ):
+        get = client.get(
+            f"/measurements/aggregate?sensor_uuid={sensor_shared['uuid']}&bucket=1d",
+            headers=header2,
+        )
+        assert get.status_code == 200
+        assert get.json()[0]["count"] == 1
+
+    async def test_aggregate_not_shared(self, client, header2, sensor, measurement):
+        get = client.get(
+            f"/measurements/aggregate?sensor_uuid={sensor['uuid']}", headers=header2
+        )
+        assert get.status_code == 200
+        assert get.json() == []
+
+    async def test_aggregate_invalid_bucket(self, client, header, sensor):
+        get = client.get(
+            f"/measurements/aggregate?sensor_uuid={sensor['uuid']}&bucket=1w",
+            headers=header,
+        )
+        assert get.status_code == 422
+
+    async def test_get_downsampled(self, client, header, sensor):
+        # Preparations
+        values = [0.0, 1.0, 0.0, 9.0, 0.0, 1.0, 0.0, -7.0, 0.0, 1.0]
+        measurements_json = [
+            {"time": f"2024-07-30T14:48:0{second}Z", "value": value}
+            for second, value in enumerate(values)
+        ]
+        client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=measurements_json,
+        )
+
+        # Get downsampled
+        get = client.get("/measurements/?max_points=4", headers=header)
+        assert get.status_code == 200
+
+        # Check extremes and endpoints are kept
+        assert [row["value"] for row in get.json()] == [0.0, 9.0, -7.0, 1.0]
+        assert get.json()[0]["time"] == measurements_json[0]["time"]
+        assert get.json()[-1]["time"] == measurements_json[-1]["time"]
+
+    async def test_get_downsampled_below_threshold(self, client, header, measurement):
+        get = client.get("/measurements/?max_points=4", headers=header)
+        assert get.status_code == 200
+        assert get.json() == [measurement]
+
+    async def test_get_downsampled_paginated(self, client, header, measurement):
+        get = client.get("/measurements/?max_points=4&limit=2", headers=header)
+        assert get.status_code == 422
+
+    async def test_rollups(self, client, header, sensor):
+        # Create out of order, with a late reading in an earlier bucket
+        measurements_json = [
+            {"time": "2024-07-30T14:10:30Z", "value": 3.0},
+            {"time": "2024-07-30T15:10:00Z", "value": -4.0},
+            {"time": "2024-07-30T14:10:00Z", "value": 1.0},
+        ]
+        client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=measurements_json[:2],
+        )
+        client.post(
+            f"/measurements/{sensor['uuid']}", headers=header, json=measurements_json[2]
+        )
+
+        # Check rollups
+        rollups = await MeasurementRollup.filter(sensor_id=sensor["uuid"]).values_list(
+            "resolution", "minimum", "maximum", "total", "count"
+        )
+        assert sorted(rollups) == [
+            (60, -4.0, -4.0, -4.0, 1),
+            (60, 1.0, 3.0, 4.0, 2),
+            (3600, -4.0, -4.0, -4.0, 1),
+            (3600, 1.0, 3.0, 4.0, 2),
+            (86400, -4.0, 3.0, 0.0, 3),
+        ]
+
+    async def test_rollups_edit_remove(self, client, header, sensor):
+        # Preparations
+        measurements_json = [
+            {"time": "2024-07-30T14:10:00Z", "value": 1.0},
+            {"time": "2024-07-30T14:10:30Z", "value": 3.0},
+        ]
+        create = client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=measurements_json,
+        )
+        first, second = create.json()["measurements"]
+
+        # Move one reading to another hour and remove the other
+        client.patch(
+            f"/measurements/{first['uuid']}",
+            headers=header,
+            json={"time": "2024-07-30T16:00:00Z"},
+        )
+        client.delete(f"/measurements/{second['uuid']}", headers=header)
+
+        # Check rollups
+        rollups = await MeasurementRollup.filter(sensor_id=sensor["uuid"]).values_list(
+            "resolution", "minimum", "maximum", "total", "count"
+        )
+        assert sorted(rollups) == [
+            (60, 1.0, 1.0, 1.0, 1),
+            (3600, 1.0, 1.0, 1.0, 1),
+            (86400, 1.0, 1.0, 1.0, 1),
+        ]
+
+    async def test_rollups_on_conflict_update(self, client, header, sensor):
+        # Preparations
+        url = f"/measurements/{sensor['uuid']}/bulk"
+        measurement_json = {"time": "2024-07-30T14:10:00Z", "value": 1.0}
+        client.post(url, headers=header, json=[measurement_json])
+
+        # Overwrite
+        client.post(
+            f"{url}?on_conflict=update",
+            headers=header,
+            json=[{**measurement_json, "value": 5.0}],
+        )
+
+        # Check rollups
+        rollups = await MeasurementRollup.filter(sensor_id=sensor["uuid"]).values_list(
+            "resolution", "total", "count"
+        )
+        assert sorted(rollups) == [(60, 5.0, 1), (3600, 5.0, 1), (86400, 5.0, 1)]
+
+    @pytest.mark.parametrize(
+        "query, count",
+        [
+            ("bucket=1d", 7),
+            ("bucket=2h", 7),
+            ("bucket=1d&start_time=2024-07-30T00:00:00Z", 7),
+            ("bucket=1d&start_time=2024-07-30T00:00:01Z", 1),
+            ("bucket=90s", 1),
+        ],
+    )
+    async def test_aggregate_rollups(self, client, header, sensor, query, count):
+        # Preparations
+        client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=[{"time": "2024-07-30T14:10:00Z", "value": 1.0}],
+        )
+        await MeasurementRollup.filter(sensor_id=sensor["uuid"]).update(count=7)
+
+        # Aggregate, reading rollups only when they are aligned with the query
+        get = client.get(
+            f"/measurements/aggregate?sensor_uuid={sensor['uuid']}&{query}",
+            headers=header,
+        )
+        assert get.status_code == 200
+        assert get.json()[0]["count"] == count
+
+    async def test_get_latest(
+        self, client, header, device, sensor, measurement, measurement2_json
+    ):
+        # Older reading arrives late
+        client.post(
+            f"/measurements/{sensor['uuid']}", headers=header, json=measurement2_json
+        )
+
+        # Get latest by device and by sensor
+        expected = [{**measurement, "sensor_uuid": sensor["uuid"]}]
+        for query in (f"device_uuid={device['uuid']}", f"sensor_uuid={sensor['uuid']}"):
+            get = client.get(f"/measurements/latest?{query}", headers=header)
+            assert get.status_code == 200
+            assert get.json() == expected
+
+    async def test_get_latest_many(
+        self, client, header, device_shared, sensor_shared, sensor_shared2
+    ):
+        # Preparations
+        client.post(
+            "/measurements/batch",
+            headers=header,
+            json={
+                sensor_shared["uuid"]: [
+                    {"time": "2024-07-30T14:10:00Z", "value": 1.0},
+                    {"time": "2024-07-30T14:20:00Z", "value": 2.0},
+                ],
+                sensor_shared2["uuid"]: [
+                    {"time": "2024-07-30T14:00:00Z", "value": 3.0},
+                ],
+            },
+        )
+
+        # Get latest
+        get = client.get(
+            f"/measurements/latest?device_uuid={device_shared['uuid']}", headers=header
+        )
+        assert get.status_code == 200
+        latest = {row["sensor_uuid"]: row["value"] for row in get.json()}
+        assert latest == {sensor_shared["uuid"]: 2.0, sensor_shared2["uuid"]: 3.0}
+
+    async def test_get_latest_edit_remove(
+        self, client, header, sensor, measurement, measurement2_json
+    ):
+        # Preparations
+        older = client.post(
+            f"/measurements/{sensor['uuid']}", headers=header, json=measurement2_json
+        ).json()
+        url = f"/measurements/latest?sensor_uuid={sensor['uuid']}"
+
+        # Move the latest reading back in time
+        client.patch(
+            f"/measurements/{measurement['uuid']}",
+            headers=header,
+            json={"time": "2022-01-01T00:00:00Z"},
+        )
+        assert client.get(url, headers=header).json()[0]["uuid"] == older["uuid"]
+
+        # Remove readings
+        client.delete(f"/measurements/{older['uuid']}", headers=header)
+        assert client.get(url, headers=header).json()[0]["uuid"] == measurement["uuid"]
+        client.delete(f"/measurements/{measurement['uuid']}", headers=header)
+        assert client.get(url, headers=header).json() == []
+
+    async def test_get_latest_shared(
+        self, client, header2, sensor_shared, measurement_shared
+    ):
+        get = client.get(
+            f"/measurements/latest?sensor_uuid={sensor_shared['uuid']}",
+            headers=header2,
+        )
+        assert get.status_code == 200
+        assert get.json()[0]["uuid"] == measurement_shared["uuid"]
+
+    async def test_get_latest_not_shared(self, client, header2, sensor, measurement):
+        get = client.get(
+            f"/measurements/latest?sensor_uuid={sensor['uuid']}", headers=header2
+        )
+        assert get.status_code == 200
+        assert get.json() == []
+
+    async def test_get_fields(self, client, header, measurement, measurement_json):
+        get = client.get("/measurements/?fields=time,value", headers=header)
+        assert get.status_code == 200
+        assert get.json() == [measurement_json]
+
+    async def test_get_fields_paginated(
+        self, client, header, sensor, measurement, measurement2_json
+    ):
+        # Preparations
+        client.post(
+            f"/measurements/{sensor['uuid']}", headers=header, json=measurement2_json
+        )
+
+        # Get pages
+        get = client.get("/measurements/?fields=value&limit=1", headers=header)
+        assert get.json() == [{"value": measurement2_json["value"]}]
+        get = client.get(
+            "/measurements/?fields=value&limit=1&cursor="
+            + get.headers["X-Next-Cursor"],
+            headers=header,
+        )
+        assert get.json() == [{"value": measurement["value"]}]
+
+    async def test_get_columns(
+        self, client, header, sensor, measurement, measurement2_json
+    ):
+        # Preparations
+        client.post(
+            f"/measurements/{sensor['uuid']}", headers=header, json=measurement2_json
+        )
+
+        # Get columns
+        get = client.get("/measurements/columns", headers=header)
+        assert get.status_code == 200
+        assert get.headers["X-Row-Count"] == "2"
+        assert get.json() == {
+            "time": [measurement2_json["time"], measurement["time"]],
+            "value": [measurement2_json["value"], measurement["value"]],
+        }
+
+    async def test_get_columns_binary(self, client, header, measurement):
+        get = client.get("/measurements/columns?format=binary", headers=header)
+        assert get.status_code == 200
+        assert get.headers["content-type"] == "application/octet-stream"
+        time, value = struct.unpack("<qd", get.content)
+        assert time == 1722350880000000
+        assert value == measurement["value"]
+
+    async def test_get_columns_shared(
+        self, client, header2, sensor_shared, measurement_shared
+    ):
+        get = client.get(
+            f"/measurements/columns?sensor_uuid={sensor_shared['uuid']}",
+            headers=header2,
+        )
+        assert get.json()["value"] == [measurement_shared["value"]]
+
+    async def test_get_shared_queries(
+        self, client, header, header2, sensor_shared, measurement_shared, queries
+    ):
+        for user_header in (header, header2):
+            queries.count = 0
+            get = client.get(
+                f"/measurements/?sensor_uuid={sensor_shared['uuid']}",
+                headers=user_header,
+            )
+            assert get.json() == [measurement_shared]
+            assert queries.count == 1
+
+    async def test_get_not_shared_queries(
+        self, client, header2, sensor, measurement, queries
+    ):
+        queries.count = 0
+        get = client.get(
+            f"/measurements/?sensor_uuid={sensor['uuid']}", headers=header2
+        )
+        assert get.json() == []
+        assert queries.count == 1
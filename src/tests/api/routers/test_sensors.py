@@ -303,3 +303,21 @@ class TestSensors:
         get = client.get(f"/sensors/", headers=header2)
         assert get.status_code == 200
         assert get.json() == []
+
+    async def test_get_fields(self, client, header2, sensor_shared):
+        get = client.get(
+            f"/sensors/?uuid={sensor_shared["uuid"]}&fields=uuid", headers=header2
+        )
+        assert get.status_code == 200
+        assert get.json() == [{"uuid": sensor_shared["uuid"]}]
+
+    async def test_get_shared_queries(
+        self, client, header, header2, device_shared, sensor_shared, queries
+    ):
+        for user_header in (header, header2):
+            queries.count = 0
+            get = client.get(
+                f"/sensors/?device_uuid={device_shared["uuid"]}", headers=user_header
+            )
+            assert get.json() == [sensor_shared]
+            assert queries.count == 1
@@ -1,5 +1,6 @@
 import pytest
 from argon2 import PasswordHasher
+from app.internal.validators import DeliverabilityChecker
 from app.models.user import User
 
 
@@ -331,3 +332,38 @@ class TestUser:
         get = client.get("/users/", headers=header)
         assert get.status_code == 422
         assert all(key in str(get.json()) for key in keys)
+
+    async def test_email_deliverability(self, client, user_json, monkeypatch):
+        # Answer deliverability lookups without DNS
+        checker = DeliverabilityChecker(offline=False, ttl_seconds=60, timeout=1)
+        lookups = []
+
+        def lookup(domain, domain_i18n):
+            lookups.append(domain)
+            if domain == "xyz.com":
+                return None
+            return f"The domain name {domain_i18n} does not exist."
+
+        monkeypatch.setattr(checker, "_lookup", lookup)
+        monkeypatch.setattr("app.models.user.email_deliverability", checker)
+
+        # Create with undeliverable domain
+        edited_json = {**user_json, "email": "email@missing.com"}
+        post = client.post("/users/", json=edited_json)
+        assert post.status_code == 422
+        assert all(key in str(post.json()) for key in ["email", "not exist"])
+
+        # Create with deliverable domain, then retry the undeliverable one
+        post = client.post("/users/", json=user_json)
+        assert post.status_code == 200
+        post = client.post("/users/", json=edited_json)
+        assert post.status_code == 422
+
+        # Check cached lookups
+        assert lookups == ["missing.com", "xyz.com"]
+        assert checker.metrics() == {
+            "offline": False,
+            "cached": 2,
+            "hits": 1,
+            "misses": 2,
+        }
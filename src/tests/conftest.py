@@ -1,7 +1,14 @@
+import logging
+import os
 import pytest
 from fastapi.testclient import TestClient
 from tortoise import Tortoise
-from app.main import app
+
+os.environ.setdefault("PASSWORD_HASH_PROFILE", "minimal")
+os.environ.setdefault("EMAIL_DELIVERABILITY_OFFLINE", "true")
+
+from app.main import app  # noqa: E402
+from app.startup.migrations import migrate, run_backfills  # noqa: E402
 
 
 async def init_db() -> None:
@@ -14,6 +21,20 @@ async def init_db() -> None:
         },
     )
     await Tortoise.generate_schemas()
+    await migrate()
+    await run_backfills()
+
+
+class QueryCounter(logging.Handler):
+    statements = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.getMessage().lstrip().upper().startswith(self.statements):
+            self.count += 1
 
 
 def create_user(client, user_json):
@@ -45,6 +66,18 @@ async def init_tests():
     await Tortoise._drop_databases()
 
 
+@pytest.fixture(scope="function")
+def queries():
+    logger = logging.getLogger("tortoise.db_client")
+    level = logger.level
+    counter = QueryCounter()
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(counter)
+    yield counter
+    logger.removeHandler(counter)
+    logger.setLevel(level)
+
+
 @pytest.fixture(scope="session")
 def anyio_backend():
     return "asyncio"
@@ -0,0 +1,120 @@
+import pytest
+from app.internal.sql import get_connection
+from app.models import LatestMeasurement, Measurement, MeasurementRollup
+from app.startup import migrations
+from app.startup.migrations import MIGRATIONS, migrate, run_backfills, save_position
+
+
+async def index_names() -> set[str]:
+    rows = await get_connection().execute_query_dict(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+    )
+    return {row["name"] for row in rows}
+
+
+@pytest.mark.anyio
+class TestMigrations:
+
+    async def test_migrate(self):
+        # Fresh schemas already have the indexes
+        await get_connection().execute_script("DELETE FROM schema_version")
+        indexes = await index_names()
+        assert await migrate() == [version for version, *_ in MIGRATIONS]
+        assert await index_names() == indexes
+
+        # Applied migrations are skipped
+        assert await migrate() == []
+
+    async def test_migrate_existing(self):
+        # Simulate a database created before the indexes
+        await get_connection().execute_script("DELETE FROM schema_version")
+        indexes = await index_names()
+        for name in indexes:
+            if name.startswith("idx_"):
+                await get_connection().execute_script(f'DROP INDEX "{name}"')
+
+        # Migrate
+        await migrate()
+        assert await index_names() == indexes
+
+    async def test_backfill_rollups(self, client, user, header, sensor, monkeypatch):
+        # Simulate readings stored before the rollups backfill
+        version = migrations.ROLLUPS_BACKFILL
+        await get_connection().execute_script(
+            f"DELETE FROM schema_version WHERE version = {version}"
+        )
+        monkeypatch.setattr(migrations, "applied_migrations", set())
+        for time, value in (
+            ("2024-07-30T14:10:00Z", 1.0),
+            ("2024-07-30T14:40:30Z", 3.0),
+        ):
+            await Measurement.create(
+                time=time, value=value, sensor_id=sensor["uuid"], user_id=user["uuid"]
+            )
+        url = f"/measurements/aggregate?sensor_uuid={sensor['uuid']}&bucket=1h"
+
+        # Aggregate from raw readings until backfilled
+        get = client.get(url, headers=header)
+        assert [bucket["count"] for bucket in get.json()] == [2]
+
+        # Backfill and aggregate from rollups
+        assert await run_backfills() == [version]
+        rollups = await MeasurementRollup.filter(sensor_id=sensor["uuid"]).values_list(
+            "resolution", "total", "count"
+        )
+        assert sorted(rollups) == [
+            (60, 1.0, 1),
+            (60, 3.0, 1),
+            (3600, 4.0, 2),
+            (86400, 4.0, 2),
+        ]
+        get = client.get(url, headers=header)
+        assert [bucket["count"] for bucket in get.json()] == [2]
+
+    async def test_backfill_latest(self, client, user, header, device, sensor):
+        # Simulate readings stored before the latest measurements table
+        readings = [
+            await Measurement.create(
+                time=time, value=value, sensor_id=sensor["uuid"], user_id=user["uuid"]
+            )
+            for time, value in (
+                ("2024-07-30T14:40:00Z", 3.0),
+                ("2024-07-30T14:10:00Z", 1.0),
+            )
+        ]
+        await get_connection().execute_script(
+            f"DELETE FROM schema_version WHERE version = {migrations.LATEST_BACKFILL}"
+        )
+        url = f"/measurements/latest?device_uuid={device['uuid']}"
+        assert client.get(url, headers=header).json() == []
+
+        # Backfill
+        assert await run_backfills() == [migrations.LATEST_BACKFILL]
+        assert await LatestMeasurement.all().count() == 1
+        get = client.get(url, headers=header)
+        assert [row["uuid"] for row in get.json()] == [str(readings[0].uuid)]
+        assert get.json()[0]["value"] == 3.0
+
+    async def test_backfill_rollups_resume(self, user, sensor):
+        # Simulate a backfill interrupted after the January windows
+        version = migrations.ROLLUPS_BACKFILL
+        await get_connection().execute_script(
+            f"DELETE FROM schema_version WHERE version = {version}"
+        )
+        for time in ("2024-01-10T10:00:00Z", "2024-07-30T14:10:00Z"):
+            await Measurement.create(
+                time=time, value=1.0, sensor_id=sensor["uuid"], user_id=user["uuid"]
+            )
+        await save_position(version, f"{sensor['uuid']}|2024-07-29T00:00:00+00:00")
+
+        # Resume
+        assert await run_backfills() == [version]
+        rollups = await MeasurementRollup.filter(sensor_id=sensor["uuid"]).values_list(
+            "resolution", "time"
+        )
+        assert {time.month for _, time in rollups} == {7}
+        assert len(rollups) == 3
+        progress = await get_connection().execute_query_dict(
+            "SELECT * FROM backfill_progress"
+        )
+        assert progress == []
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+import pytest
+from app.startup import partitions
+
+
+@pytest.mark.anyio
+class TestPartitions:
+
+    @pytest.mark.parametrize(
+        "interval, time, start, finish, name",
+        [
+            ("month", "2024-12-31T23:59:59Z", "2024-12-01", "2025-01-01", "m202412"),
+            ("month", "2024-02-29T12:00:00Z", "2024-02-01", "2024-03-01", "m202402"),
+            ("week", "2024-07-30T14:48:00Z", "2024-07-29", "2024-08-05", "w20240729"),
+            ("week", "2024-12-30T00:00:00Z", "2024-12-30", "2025-01-06", "w20241230"),
+        ],
+    )
+    async def test_partition_bounds(self, interval, time, start, finish, name):
+        first = partitions.partition_start(datetime.fromisoformat(time), interval)
+        assert first == datetime.fromisoformat(start).replace(tzinfo=timezone.utc)
+        assert partitions.next_partition(first, interval).date().isoformat() == finish
+        assert partitions.partition_name(first, interval) == f"measurement_{name}"
+
+    async def test_partition_statement(self):
+        start = datetime(2024, 7, 1, tzinfo=timezone.utc)
+        assert partitions.partition_statement(start, "month") == (
+            'CREATE TABLE IF NOT EXISTS "measurement_m202407" '
+            'PARTITION OF "measurement" FOR VALUES FROM '
+            "('2024-07-01T00:00:00+00:00') TO ('2024-08-01T00:00:00+00:00')"
+        )
+
+    async def test_move_default_statement(self):
+        start = datetime(2024, 7, 1, tzinfo=timezone.utc)
+        condition = (
+            "\"time\" >= '2024-07-01T00:00:00+00:00' "
+            "AND \"time\" < '2024-08-01T00:00:00+00:00'"
+        )
+        assert partitions.move_default_statement(start, "month") == (
+            'CREATE TABLE "measurement_m202407" '
+            '(LIKE "measurement" INCLUDING DEFAULTS); '
+            'INSERT INTO "measurement_m202407" SELECT * FROM "measurement_default" '
+            f"WHERE {condition}; "
+            f'DELETE FROM "measurement_default" WHERE {condition}; '
+            'ALTER TABLE "measurement" ATTACH PARTITION "measurement_m202407" '
+            "FOR VALUES FROM ('2024-07-01T00:00:00+00:00') "
+            "TO ('2024-08-01T00:00:00+00:00')"
+        )
+
+    async def test_setup_not_postgres(self, monkeypatch):
+        monkeypatch.setattr(partitions, "PARTITIONING", "month")
+        await partitions.setup_partitioning()
+        assert partitions._maintenance is None
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.models import LatestMeasurement, Measurement, MeasurementRollup
+from app.startup.retention import RetentionPruner
+
+
+def readings(days_ago: list[int]) -> list[dict]:
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    return [
+        {"time": (now - timedelta(days=days)).isoformat(), "value": float(days)}
+        for days in days_ago
+    ]
+
+
+@pytest.mark.anyio
+class TestRetention:
+
+    async def test_prune(self, client, header, sensor):
+        # Preparations
+        client.patch(
+            f"/sensors/{sensor['uuid']}", headers=header, json={"retention_days": 30}
+        )
+        client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=readings([1, 40, 50, 60, 70, 80]),
+        )
+        rollups = await MeasurementRollup.all().count()
+
+        # Prune in batches
+        pruner = RetentionPruner(None, 2, 3600, keep_rollups=True)
+        assert await pruner.prune() == 5
+        assert await Measurement.all().values_list("value", flat=True) == [1.0]
+        assert await MeasurementRollup.all().count() == rollups
+        assert pruner.metrics()["pruned_rows"] == 5
+
+    async def test_prune_device_default(self, client, header, device, sensor):
+        # Preparations
+        client.patch(
+            f"/devices/{device['uuid']}", headers=header, json={"retention_days": 30}
+        )
+        client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=readings([40, 50]),
+        )
+
+        # Prune without keeping rollups
+        pruner = RetentionPruner(None, 100, 3600, keep_rollups=False)
+        assert await pruner.prune() == 2
+        assert await MeasurementRollup.all().count() == 0
+        assert await LatestMeasurement.all().count() == 0
+
+    @pytest.mark.parametrize("default_days, pruned", [(None, 0), (45, 1)])
+    async def test_prune_default(self, client, header, sensor, default_days, pruned):
+        client.post(
+            f"/measurements/{sensor['uuid']}/bulk",
+            headers=header,
+            json=readings([40, 50]),
+        )
+        pruner = RetentionPruner(default_days, 100, 3600, keep_rollups=True)
+        assert await pruner.prune() == pruned
+
+    async def test_invalid_retention(self, client, header, sensor):
+        patch = client.patch(
+            f"/sensors/{sensor['uuid']}", headers=header, json={"retention_days": 0}
+        )
+        assert patch.status_code == 422